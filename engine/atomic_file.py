@@ -0,0 +1,32 @@
+# --- engine/atomic_file.py ---
+
+import os
+import uuid
+
+# Shared way to replace a file that other threads, processes or hosts may be reading (caches, panels, snapshots,
+# queue entries): write a temp file next to it, then os.replace it into place, so readers see either the old file
+# or the new one, never a half-written one. Temp names are unique per write, so two writers of the same path never
+# write into (or publish) each other's temp file, and whichever os.replace runs last wins.
+
+def atomic_write(path, write, binary=True):
+    """
+    Replaces `path` with whatever write(f) writes, in one step.
+
+    Args:
+        path (str): File to (re)write; its folder must already exist.
+        write (callable): Called with the open temp file; writes the whole new content.
+        binary (bool): Open the temp file in binary ('wb') rather than text ('w') mode.
+
+    Returns:
+        str: `path`
+    """
+    tmp_path = f"{path}.{uuid.uuid4().hex[:12]}.tmp"
+    try:
+        with open(tmp_path, 'xb' if binary else 'x') as f:
+            write(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try: os.remove(tmp_path) # Never leave a stray temp file behind a failed write
+        except OSError: pass
+        raise
+    return path
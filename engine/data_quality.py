@@ -0,0 +1,129 @@
+# --- engine/data_quality.py ---
+
+import os
+import json
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from engine.atomic_file import atomic_write
+
+# Panel-wide validation of downloaded OHLCV data. Every check runs once over (dates x symbols) arrays for the
+# whole universe, so validating 500 symbols costs about as much as validating one.
+#     gaps                missing bars between a symbol's first and last bar
+#     non_positive_bars   bars with a zero or negative open/high/low/close
+#     volume_outliers     bars whose volume is more than `volume_outlier_factor` times the trailing median
+#     split_like_jumps    close-to-close moves of at least `split_jump` that sit close to a whole or half ratio
+#                         (2:1, 5:1, 1:2, ...): with auto-adjusted data these point to an unadjusted split or bonus
+#     stale_days          calendar days between the symbol's last bar and the latest bar in the panel
+#     short_history       fewer than `min_history` bars; indicators would silently drop the symbol
+# Symbols with gaps, bad prices, split-like jumps or a stale last bar are worth downloading again; the others
+# are only reported. Results go to <name>.quality.json next to the OHLCV CSV.
+
+DEFAULT_SETTINGS = {'min_history': 252, 'stale_days': 5, 'volume_window': 20, 'volume_outlier_factor': 20.0, 'split_jump': 1.8}
+REFETCH_ISSUES = ('gaps', 'non_positive_bars', 'split_like_jumps', 'stale_days')
+
+def _report_path(csv_path):
+    return f"{os.path.splitext(csv_path)[0]}.quality.json"
+
+def check_fields(field_frames, settings=None):
+    """
+    Validates every symbol of a panel at once.
+
+    Args:
+        field_frames (dict): {'Open', 'High', 'Low', 'Close', 'Volume': dates x symbols DataFrame}.
+        settings (dict): 'data_quality' section of config.json; missing keys use DEFAULT_SETTINGS.
+
+    Returns:
+        dict: {symbol: issues dict} for flagged symbols only; issues['refetch'] says whether a new download may help
+    """
+    settings = {**DEFAULT_SETTINGS, **(settings or {})}
+    close = field_frames['Close']
+    dates, symbols = close.index, list(close.columns)
+    if close.empty: return {}
+    values = close.to_numpy(dtype=float)
+    n_bars = len(dates)
+
+    valid = ~np.isnan(values)
+    has_data = valid.any(axis=0)
+    first = valid.argmax(axis=0)
+    last = n_bars - 1 - valid[::-1].argmax(axis=0)
+    rows = np.arange(n_bars)[:, None]
+    gaps = ((rows >= first) & (rows <= last) & ~valid).sum(axis=0)
+    bars = valid.sum(axis=0)
+
+    prices = np.stack([field_frames[f].to_numpy(dtype=float) for f in ('Open', 'High', 'Low', 'Close') if f in field_frames])
+    non_positive = (prices <= 0).any(axis=0).sum(axis=0) # NaN compares False, so missing bars are not counted twice
+
+    stale_days = np.asarray((dates[-1] - dates[last]).days)
+
+    outliers = np.zeros(len(symbols), dtype=np.int64)
+    if 'Volume' in field_frames:
+        volume = field_frames['Volume']
+        window = int(settings['volume_window'])
+        median = volume.rolling(window=window, min_periods=max(1, window // 2)).median().shift(1).to_numpy(dtype=float)
+        with np.errstate(invalid='ignore'):
+            outliers = ((volume.to_numpy(dtype=float) > float(settings['volume_outlier_factor']) * median) & (median > 0)).sum(axis=0)
+
+    # Moves are measured from the previous available close, so a gap does not hide (or fake) a jump
+    previous = close.ffill().shift(1).to_numpy(dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = values / previous
+        move = np.where(ratio >= 1, ratio, 1 / ratio)
+        half_steps = 2 * move
+        split_like = (move >= float(settings['split_jump'])) & (np.abs(half_steps - np.rint(half_steps)) <= 0.05 * half_steps)
+    split_counts = split_like.sum(axis=0)
+    last_split = n_bars - 1 - split_like[::-1].argmax(axis=0)
+
+    issues = {}
+    for j, symbol in enumerate(symbols):
+        if not has_data[j]:
+            issues[symbol] = {'bars': 0, 'no_data': True, 'refetch': True}; continue
+        found = {}
+        if gaps[j]: found['gaps'] = int(gaps[j])
+        if non_positive[j]: found['non_positive_bars'] = int(non_positive[j])
+        if outliers[j]: found['volume_outliers'] = int(outliers[j])
+        if split_counts[j]:
+            found['split_like_jumps'] = int(split_counts[j])
+            found['last_split_like_date'] = dates[last_split[j]].strftime('%Y-%m-%d')
+        if stale_days[j] > int(settings['stale_days']):
+            found['stale_days'] = int(stale_days[j])
+            found['last_date'] = dates[last[j]].strftime('%Y-%m-%d')
+        if bars[j] < int(settings['min_history']): found['short_history'] = True
+        if not found: continue
+        found['bars'] = int(bars[j])
+        found['refetch'] = any(issue in found for issue in REFETCH_ISSUES)
+        issues[symbol] = found
+    return issues
+
+def refetch_candidates(issues): # Symbols a new download may fix, in a stable order
+    return sorted(symbol for symbol, found in issues.items() if found.get('refetch'))
+
+def write_report(csv_path, dataset_name, issues, symbols_checked, last_date, refetched=()):
+    """Writes the machine-readable quality report next to the OHLCV CSV and returns its path."""
+    summary = {}
+    for found in issues.values():
+        for issue in found:
+            if issue in ('bars', 'refetch', 'last_date', 'last_split_like_date'): continue
+            summary[issue] = summary.get(issue, 0) + 1
+    report = {
+        'dataset': dataset_name,
+        'generated': datetime.now().strftime("%Y-%m-%d %H:%M"),
+        'last_date': None if last_date is None else pd.Timestamp(last_date).strftime('%Y-%m-%d'),
+        'symbols_checked': int(symbols_checked),
+        'symbols_flagged': len(issues),
+        'summary': summary,
+        'refetched': list(refetched),
+        'symbols': issues,
+    }
+    return atomic_write(_report_path(csv_path), lambda f: json.dump(report, f, indent=1), binary=False)
+
+def load_report(csv_path): # Last quality report for an OHLCV CSV, or None
+    try:
+        with open(_report_path(csv_path), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def clear_report(csv_path): # Removes a report that no longer describes the data on disk
+    try: os.remove(_report_path(csv_path))
+    except OSError: pass
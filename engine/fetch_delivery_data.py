@@ -2,7 +2,6 @@
 
 import pandas as pd
 from datetime import datetime, timedelta
-from nse import NSE
 import tempfile
 import shutil
 from pathlib import Path
@@ -16,6 +15,7 @@ def get_latest_delivery_report(days_to_check=7, log_func=print):
         days_to_check (int): How many past days to check for a report.
         log_func (function): The logging function from the main engine.
     """
+    from nse import NSE # Deferred: the NSE client is only needed when a report is actually downloaded
     temp_dir = tempfile.mkdtemp()
     
     try:
@@ -1,7 +1,16 @@
 import pandas as pd
 from datetime import datetime
+import heapq
 
-def create_wide_report(raw_results, analysis_name): # Converts the raw signal list into a final, wide-format DataFrame report
+def _score(record): # Numeric part of a "x/10" score, -1 if unparseable
+    try: return int(str(record['Signals Score']).split('/')[0])
+    except (ValueError, IndexError): return -1
+
+def _rank_key(record): # Rank Score for ordering, with unranked stocks last
+    value = record.get('Rank Score', float('nan'))
+    return value if value == value else float('-inf')
+
+def create_wide_report(raw_results, analysis_name, ranking=None, top_k=0): # Converts the raw signal list into a final, wide-format DataFrame report
     if not raw_results: # Handle cases where no signals were generated
         print(f"INFO: No raw results found for '{analysis_name}'. Returning an empty report.")
         return pd.DataFrame()
@@ -22,6 +31,8 @@ def create_wide_report(raw_results, analysis_name): # Converts the raw signal li
             'All Signals Met': signals_met == total_signals,
             'Signals Score': f"{signals_met}/{total_signals}"
         }
+        if ranking is not None: # Cross-sectional columns (Rank Score, RS vs Benchmark %) for this stock, if ranked
+            for col in ranking.columns: record[col] = ranking.at[stock_name, col] if stock_name in ranking.index else float('nan')
 
         # Iterate through the signals for this stock and pivot them into wide-format columns
         for i, row in group.reset_index(drop=True).iterrows():
@@ -36,13 +47,19 @@ def create_wide_report(raw_results, analysis_name): # Converts the raw signal li
     if not pivoted_records: # Final check in case grouping failed
         return pd.DataFrame()
 
+    if top_k and len(pivoted_records) > top_k: # Keep the best K by score, then Rank Score, via a bounded heap
+        pivoted_records = heapq.nlargest(top_k, pivoted_records, key=lambda r: (_score(r), _rank_key(r)))
+
     wide_df = pd.DataFrame(pivoted_records)
     
     # Create a temporary numeric sort key to handle scores like "10/10" vs "2/10" correctly
     try:
         wide_df['sort_key'] = wide_df['Signals Score'].apply(lambda x: int(x.split('/')[0]))
-        # Sort by the highest score first, then alphabetically by stock name
-        wide_df.sort_values(by=['sort_key', 'Stock'], ascending=[False, True], inplace=True)
+        # Sort by the highest score first, then by cross-sectional Rank Score (when ranked), then alphabetically by stock name
+        if 'Rank Score' in wide_df.columns:
+            wide_df.sort_values(by=['sort_key', 'Rank Score', 'Stock'], ascending=[False, False, True], na_position='last', inplace=True)
+        else:
+            wide_df.sort_values(by=['sort_key', 'Stock'], ascending=[False, True], inplace=True)
         wide_df.drop(columns='sort_key', inplace=True) # Remove the temporary sort key
     except (ValueError, IndexError):
         # Fallback sort if 'Signals Score' format is unexpected
@@ -0,0 +1,54 @@
+# --- engine/import_budget.py ---
+# Start-up regression check. Run from the project root:
+#     python -m engine.import_budget
+# Each entry point is imported in a fresh interpreter; the check fails (exit code 1) if it
+# exceeds its time budget or drags in a heavy module that should only load on first use.
+
+import json
+import os
+import subprocess
+import sys
+
+HEAVY_MODULES = ['pandas', 'numpy', 'yfinance', 'requests', 'nse', 'openpyxl']
+
+# entry module -> (budget in seconds, heavy modules it is allowed to import at start-up)
+IMPORT_BUDGETS = {
+    'main': (0.25, []),
+    'app_gui': (0.90, []), # customtkinter/tkinter are needed to draw the window and are not "heavy" here
+}
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'seconds': elapsed, 'loaded': [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+def measure(module, repeats=3): # Best-of-N cold import time in a fresh interpreter, plus heavy modules it loaded
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    best = None
+    for _ in range(repeats):
+        proc = subprocess.run([sys.executable, '-c', _PROBE.format(module=module, heavy=HEAVY_MODULES)], cwd=project_root, capture_output=True, text=True)
+        if proc.returncode != 0:
+            return None, proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else 'import failed'
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+        if best is None or result['seconds'] < best['seconds']: best = result
+    return best, None
+
+def check_budgets(log_func=print):
+    ok = True
+    for module, (budget, allowed) in IMPORT_BUDGETS.items():
+        result, error = measure(module)
+        if result is None:
+            log_func(f"SKIPPED: 'import {module}' could not run here: {error}")
+            continue
+        unexpected = [m for m in result['loaded'] if m not in allowed]
+        passed = result['seconds'] <= budget and not unexpected
+        ok &= passed
+        status = "PASS" if passed else "FAIL"
+        log_func(f"{status}: 'import {module}' took {result['seconds']*1000:.0f} ms (budget {budget*1000:.0f} ms)" + (f", eagerly loaded {unexpected}" if unexpected else ""))
+    return ok
+
+if __name__ == "__main__":
+    sys.exit(0 if check_budgets() else 1)
@@ -0,0 +1,106 @@
+# --- engine/kernels.py ---
+
+import numpy as np
+
+# Fused single-pass kernels for the recursive indicators (ATR, RSI, ADX).
+# Inputs are (dates x symbols) float arrays; every symbol is advanced together, one bar at a time,
+# so TR, +/-DM, the smoothed DIs, DX and ADX come out of a single loop with no full-length temporaries.
+# The smoothing reproduces pandas' ewm(adjust=False) exactly, including how it carries through NaN gaps,
+# so results match the pandas implementations in engine/indicators.py.
+# With Numba installed the loops are JIT-compiled; otherwise the same code runs as plain NumPy.
+
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError: # Optional dependency: fall back to the un-jitted NumPy loops
+    HAS_NUMBA = False
+    def njit(*args, **kwargs):
+        if args and callable(args[0]): return args[0]
+        return lambda func: func
+
+@njit(cache=True)
+def _ewm_step(weighted, old_wt, cur, alpha): # One bar of ewm(adjust=False, ignore_na=False) for every symbol
+    has_w = ~np.isnan(weighted)
+    obs = ~np.isnan(cur)
+    old_wt = np.where(has_w, old_wt * (1.0 - alpha), old_wt)
+    update = has_w & obs & (weighted != cur)
+    blended = (old_wt * weighted + alpha * cur) / (old_wt + alpha)
+    weighted = np.where(update, blended, np.where(has_w, weighted, cur))
+    old_wt = np.where(obs, 1.0, old_wt)
+    return weighted, old_wt
+
+@njit(cache=True)
+def _true_range(t, high, low, close): # Max of the three ranges, skipping NaNs like DataFrame.max(axis=1)
+    tr = high[t] - low[t]
+    if t > 0:
+        tr = np.fmax(tr, np.fmax(np.abs(high[t] - close[t - 1]), np.abs(low[t] - close[t - 1])))
+    return tr
+
+@njit(cache=True, error_model='numpy')
+def _atr_loop(high, low, close, period):
+    n_bars, n_symbols = close.shape
+    out = np.empty((n_bars, n_symbols))
+    alpha = 2.0 / (period + 1.0)
+    atr, atr_wt = np.full(n_symbols, np.nan), np.ones(n_symbols)
+    for t in range(n_bars):
+        atr, atr_wt = _ewm_step(atr, atr_wt, _true_range(t, high, low, close), alpha)
+        out[t] = atr
+    return out
+
+@njit(cache=True, error_model='numpy')
+def _rsi_loop(close, period):
+    n_bars, n_symbols = close.shape
+    out = np.empty((n_bars, n_symbols))
+    alpha = 1.0 / period # com = period - 1
+    gain, gain_wt = np.full(n_symbols, np.nan), np.ones(n_symbols)
+    loss, loss_wt = np.full(n_symbols, np.nan), np.ones(n_symbols)
+    zeros = np.zeros(n_symbols)
+    for t in range(n_bars):
+        delta = close[t] - close[t - 1] if t > 0 else np.full(n_symbols, np.nan)
+        gain, gain_wt = _ewm_step(gain, gain_wt, np.where(delta > 0, delta, zeros), alpha) # NaN delta counts as 0, as in Series.where
+        loss, loss_wt = _ewm_step(loss, loss_wt, np.where(delta < 0, -delta, zeros), alpha)
+        out[t] = np.where(loss == 0, 100.0, 100.0 - 100.0 / (1.0 + gain / loss))
+    return out
+
+@njit(cache=True, error_model='numpy')
+def _adx_loop(high, low, close, period):
+    n_bars, n_symbols = close.shape
+    out = np.empty((n_bars, n_symbols))
+    alpha = 2.0 / (period + 1.0)
+    atr, atr_wt = np.full(n_symbols, np.nan), np.ones(n_symbols)
+    pdm, pdm_wt = np.full(n_symbols, np.nan), np.ones(n_symbols)
+    mdm, mdm_wt = np.full(n_symbols, np.nan), np.ones(n_symbols)
+    adx, adx_wt = np.full(n_symbols, np.nan), np.ones(n_symbols)
+    zeros = np.zeros(n_symbols)
+    for t in range(n_bars):
+        if t > 0:
+            up, down = high[t] - high[t - 1], low[t - 1] - low[t]
+            plus_dm = np.where((up > down) & (up > 0), up, zeros) # NaN moves count as 0, as in np.where
+            minus_dm = np.where((down > up) & (down > 0), down, zeros)
+        else:
+            plus_dm, minus_dm = zeros, zeros
+        atr, atr_wt = _ewm_step(atr, atr_wt, _true_range(t, high, low, close), alpha)
+        pdm, pdm_wt = _ewm_step(pdm, pdm_wt, plus_dm, alpha)
+        mdm, mdm_wt = _ewm_step(mdm, mdm_wt, minus_dm, alpha)
+        plus_di, minus_di = 100.0 * pdm / atr, 100.0 * mdm / atr
+        dx = 100.0 * np.abs(plus_di - minus_di) / (plus_di + minus_di)
+        adx, adx_wt = _ewm_step(adx, adx_wt, dx, alpha)
+        out[t] = adx
+    return out
+
+#---------- # PUBLIC WRAPPERS (accept 1-D series or 2-D dates x symbols arrays) ----------
+
+def _as_panel(*arrays):
+    return [np.ascontiguousarray(np.asarray(a, dtype=np.float64).reshape(len(a), -1)) for a in arrays]
+
+def _run(loop, arrays, period):
+    one_dim = np.ndim(arrays[0]) == 1
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out = loop(*_as_panel(*arrays), float(period))
+    return out[:, 0] if one_dim else out
+
+def atr(high, low, close, period=14): return _run(_atr_loop, (high, low, close), period)
+
+def rsi(close, period=14): return _run(_rsi_loop, (close,), period)
+
+def adx(high, low, close, period=14): return _run(_adx_loop, (high, low, close), period)
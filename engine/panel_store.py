@@ -0,0 +1,114 @@
+# --- engine/panel_store.py ---
+
+import os
+import json
+import time
+import glob
+import numpy as np
+import pandas as pd
+from engine.result_cache import file_signature
+from engine.atomic_file import atomic_write
+
+# Persistent OHLCV panel shared by every process that reads market data (GUI, notebooks, cron jobs).
+# Layout next to each OHLCV CSV:
+#     <name>.panel.json           small header: dates, symbols, fields, data file, source CSV signature
+#     <name>.panel.<version>.npy  float64 array shaped (fields, dates, symbols), opened with mmap_mode='r'
+# Readers map the .npy read-only, so the OS page cache holds one copy however many processes open it.
+# Fields come first so each field is one contiguous (dates x symbols) block that field_frames can wrap as-is.
+# A refresh writes a new versioned .npy and then swaps the header with os.replace, so readers always
+# see either the old panel or the new one, never a half-written file. Cleanup only removes versions older than
+# the header it replaced, so two processes refreshing at once never delete each other's freshly written data.
+
+PANEL_FIELDS = ['Open', 'High', 'Low', 'Close', 'Volume']
+PANEL_LAYOUT = 'fields-dates-symbols' # Recorded in the header; panels written with another layout are rebuilt
+
+def _panel_base(csv_path):
+    return f"{os.path.splitext(csv_path)[0]}.panel"
+
+def _version_number(version): # Versions are hex nanosecond timestamps, so they order by write time
+    try: return int(version, 16)
+    except (TypeError, ValueError): return None
+
+class OHLCVPanel:
+    def __init__(self, dates, symbols, fields, values):
+        self.dates = dates           # DatetimeIndex named 'Date'
+        self.symbols = symbols       # list of ticker symbols
+        self.fields = fields         # list of field names (subset of PANEL_FIELDS)
+        self.values = values         # (fields, dates, symbols) array; a read-only memmap when opened from disk
+        self._symbol_pos = {s: i for i, s in enumerate(symbols)}
+
+    def symbol_frame(self, symbol): # One symbol's history as a Date-indexed frame; raises KeyError if absent
+        j = self._symbol_pos[symbol]
+        return pd.DataFrame(np.array(self.values[:, :, j].T), index=self.dates, columns=self.fields) # Small own copy: callers add indicator columns
+
+    def field_frames(self, symbols=None):
+        """
+        {field: dates x symbols frame} for the whole (or a sub-) universe at once.
+
+        When `symbols` covers every symbol of the panel (or is None) the frames are read-only views of the mapped
+        file in panel column order, so no process holds its own copy; only a real subset is copied out.
+        """
+        cols = None if symbols is None else [s for s in symbols if s in self._symbol_pos]
+        if cols is None or len(set(cols)) == len(self.symbols):
+            return {field: pd.DataFrame(self.values[k], index=self.dates, columns=self.symbols, copy=False) for k, field in enumerate(self.fields)}
+        positions = [self._symbol_pos[s] for s in cols]
+        return {field: pd.DataFrame(self.values[k][:, positions], index=self.dates, columns=cols, copy=False) for k, field in enumerate(self.fields)}
+
+    @classmethod
+    def from_frame(cls, ohlcv_df): # Builds an in-memory panel from the (field, symbol) column frame yfinance returns
+        present = set(ohlcv_df.columns.get_level_values(0))
+        fields = [f for f in PANEL_FIELDS if f in present]
+        symbols = sorted({s for s in ohlcv_df.columns.get_level_values(1) if isinstance(s, str) and s})
+        values = np.full((len(fields), len(ohlcv_df.index), len(symbols)), np.nan)
+        for k, field in enumerate(fields):
+            values[k] = ohlcv_df[field].reindex(columns=symbols).apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+        dates = pd.DatetimeIndex(pd.to_datetime(ohlcv_df.index, errors='coerce'), name='Date')
+        keep = ~dates.isna()
+        return cls(dates[keep], symbols, fields, values[:, keep] if not keep.all() else values)
+
+def write_panel(ohlcv_df, csv_path): # Atomically (re)publishes the panel for `csv_path`; call after the CSV is saved
+    panel = ohlcv_df if isinstance(ohlcv_df, OHLCVPanel) else OHLCVPanel.from_frame(ohlcv_df)
+    base = _panel_base(csv_path)
+    version = f"{time.time_ns():x}"
+    data_path = f"{base}.{version}.npy"
+
+    atomic_write(data_path, lambda f: np.save(f, np.ascontiguousarray(panel.values, dtype=np.float64)))
+
+    header = {
+        'version': version,
+        'layout': PANEL_LAYOUT,
+        'data_file': os.path.basename(data_path),
+        'shape': list(panel.values.shape),
+        'dates': [d.strftime('%Y-%m-%d %H:%M:%S') for d in panel.dates],
+        'symbols': panel.symbols,
+        'fields': panel.fields,
+        'source_signature': file_signature(csv_path),
+    }
+    try:
+        with open(f"{base}.json", 'r') as f:
+            replaced = _version_number(json.load(f).get('version'))
+    except (OSError, ValueError, AttributeError):
+        replaced = None # No readable header: nothing is known to be superseded; a later refresh cleans up
+    atomic_write(f"{base}.json", lambda f: json.dump(header, f), binary=False)
+
+    for old_path in glob.glob(f"{glob.escape(base)}.*.npy"): # Old versions; still-open maps keep working on POSIX
+        old_version = _version_number(old_path[len(base) + 1:-len('.npy')])
+        if old_path == data_path or replaced is None or old_version is None or old_version >= replaced: continue
+        try: os.remove(old_path)
+        except OSError: pass # Mapped by a reader on Windows; removed on a later refresh
+    return panel
+
+def open_panel(csv_path, require_fresh=True): # Zero-copy read-only panel, or None if missing, unreadable or stale
+    base = _panel_base(csv_path)
+    try:
+        with open(f"{base}.json", 'r') as f:
+            header = json.load(f)
+        if require_fresh and header.get('source_signature') != file_signature(csv_path):
+            return None
+        values = np.load(os.path.join(os.path.dirname(base), header['data_file']), mmap_mode='r')
+    except (OSError, ValueError, KeyError):
+        return None
+    if header.get('layout') != PANEL_LAYOUT or list(values.shape) != header['shape']:
+        return None
+    dates = pd.DatetimeIndex(pd.to_datetime(header['dates']), name='Date')
+    return OHLCVPanel(dates, header['symbols'], header['fields'], values)
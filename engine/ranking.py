@@ -0,0 +1,81 @@
+# --- engine/ranking.py ---
+
+import numpy as np
+import pandas as pd
+from engine import kernels
+
+# Cross-sectional analytics over a (dates x symbols) panel. Every factor is computed for all symbols and all
+# dates in one vectorised pass, turned into a per-date percentile rank across the universe, and blended into
+# a weighted 0-100 composite. Per-date top-K selection uses np.argpartition, never a full sort of the universe.
+
+DEFAULT_WEIGHTS = {'return': 0.3, 'rsi': 0.2, 'volume_ratio': 0.2, 'relative_strength': 0.3}
+
+def load_benchmark(filepath): # Benchmark index closes saved by fetch_data; None if the file is missing or unreadable
+    try:
+        df = pd.read_csv(filepath, index_col=0, parse_dates=True)
+    except (OSError, ValueError):
+        return None
+    if df.empty or 'Close' not in df.columns: return None
+    return pd.to_numeric(df['Close'], errors='coerce').dropna()
+
+def cross_sectional_ranks(field_frames, benchmark_close=None, settings=None, rsi=None):
+    """
+    Computes factor values, per-date percentile ranks and the weighted composite for a universe.
+
+    Args:
+        field_frames (dict): {'Close', 'Volume', ...: dates x symbols DataFrame} from OHLCVPanel.field_frames.
+        benchmark_close (pd.Series): Benchmark index closes; relative strength is skipped when None.
+        settings (dict): 'ranking_settings' section of config.json.
+        rsi (np.ndarray): RSI with `rsi_period` already computed for these frames (e.g. by
+                          indicators.compute_recursive_panel); computed here when None.
+
+    Returns:
+        tuple: (factors dict, ranks dict, composite DataFrame scaled 0-100)
+    """
+    settings = settings or {}
+    period = int(settings.get('return_period', 20))
+    close, volume = field_frames['Close'], field_frames['Volume']
+
+    returns = close / close.shift(period) - 1
+    if rsi is None: rsi = kernels.rsi(close.to_numpy(dtype=float), int(settings.get('rsi_period', 14)))
+    factors = {
+        'return': returns,
+        'rsi': pd.DataFrame(rsi, index=close.index, columns=close.columns),
+        'volume_ratio': volume / volume.rolling(window=int(settings.get('volume_avg_period', 20))).mean(),
+    }
+    if benchmark_close is not None and not benchmark_close.empty:
+        benchmark = benchmark_close.reindex(close.index).ffill()
+        benchmark_returns = benchmark / benchmark.shift(period) - 1
+        factors['relative_strength'] = (1 + returns).div(1 + benchmark_returns, axis=0) - 1
+
+    ranks = {name: values.rank(axis=1, pct=True) for name, values in factors.items()}
+
+    # Weighted mean of the available ranks, so a missing factor (e.g. no benchmark) re-normalises the rest
+    weights = settings.get('weights', DEFAULT_WEIGHTS)
+    weighted_sum = pd.DataFrame(0.0, index=close.index, columns=close.columns)
+    weight_total = pd.DataFrame(0.0, index=close.index, columns=close.columns)
+    for name, rank in ranks.items():
+        weight = float(weights.get(name, 0.0))
+        if weight == 0: continue
+        weighted_sum += weight * rank.fillna(0.0)
+        weight_total += weight * rank.notna()
+    composite = 100 * weighted_sum / weight_total.where(weight_total > 0)
+    return factors, ranks, composite
+
+def latest_ranking(factors, composite): # One row per symbol for the latest panel date, for merging into reports
+    latest = pd.DataFrame({'Rank Score': composite.iloc[-1].round(1)})
+    if 'relative_strength' in factors:
+        latest['RS vs Benchmark %'] = (100 * factors['relative_strength'].iloc[-1]).round(2)
+    return latest
+
+def top_k_per_date(composite, k): # dates x k frame of the k best symbols per date (best first), via argpartition
+    values = composite.to_numpy(dtype=float)
+    k = min(k, values.shape[1])
+    if k <= 0: return pd.DataFrame(index=composite.index)
+    filled = np.where(np.isnan(values), -np.inf, values)
+    candidates = np.argpartition(-filled, k - 1, axis=1)[:, :k] # Partial sort: only the top k are ordered below
+    order = np.argsort(-np.take_along_axis(filled, candidates, axis=1), axis=1, kind='stable')
+    best = np.take_along_axis(candidates, order, axis=1)
+    symbols = np.asarray(composite.columns, dtype=object)[best]
+    symbols[np.take_along_axis(filled, best, axis=1) == -np.inf] = None
+    return pd.DataFrame(symbols, index=composite.index, columns=[f"Top {i}" for i in range(1, k + 1)])
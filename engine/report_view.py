@@ -0,0 +1,69 @@
+# --- engine/report_view.py ---
+
+import numpy as np
+import pandas as pd
+
+# Helpers for viewing a wide report without copying it: filters and sorts produce an
+# array of row positions, and only the rows currently on screen are ever materialised.
+
+def score_values(df): # Numeric score per row parsed from the "x/10" 'Signals Score' strings (or a history frame's 'Score')
+    if not df.empty and 'Signals Score' not in df.columns and 'Score' in df.columns:
+        return pd.to_numeric(df['Score'], errors='coerce').fillna(0).to_numpy(dtype=np.int64)
+    if df.empty or 'Signals Score' not in df.columns:
+        return np.zeros(len(df), dtype=np.int64)
+    return pd.to_numeric(df['Signals Score'].str.split('/', n=1).str[0], errors='coerce').fillna(0).to_numpy(dtype=np.int64)
+
+def criterion_columns(df): # [(criterion label, status column)] taken from the first row of the report
+    if df.empty: return []
+    columns = []
+    i = 1
+    while f'Indicator {i} - Status' in df.columns:
+        columns.append((str(df[f'Indicator {i} - Name'].iloc[0]), f'Indicator {i} - Status'))
+        i += 1
+    return columns
+
+def view_positions(df, scores=None, min_score=None, status_col=None, status_value=None, sort_col=None, descending=False):
+    """
+    Returns the row positions of `df` that pass the filters, in display order.
+
+    Args:
+        scores (np.ndarray): Pre-computed score_values(df); re-used across calls for speed.
+        min_score (int): Keep rows whose score is at least this value.
+        status_col (str): An 'Indicator N - Status' column to filter on.
+        status_value (str): 'TRUE' or 'FALSE' required in `status_col`.
+        sort_col (str): Column to sort by; 'Signals Score' sorts numerically.
+    """
+    if scores is None: scores = score_values(df)
+    mask = np.ones(len(df), dtype=bool)
+    if min_score is not None:
+        mask &= scores >= min_score
+    if status_col and status_value and status_col in df.columns:
+        mask &= df[status_col].to_numpy() == status_value
+    positions = np.flatnonzero(mask)
+
+    if sort_col and sort_col in df.columns and len(positions) > 1:
+        if sort_col == 'Signals Score': keys, missing = scores[positions], None
+        else: keys, missing = _sort_keys(df[sort_col].to_numpy()[positions])
+        order = np.argsort(keys, kind='stable')
+        if descending: order = order[::-1]
+        if missing is not None and missing.any(): # Missing values go last in either direction
+            order = np.concatenate([order[~missing[order]], order[missing[order]]])
+        positions = positions[order]
+    return positions
+
+MISSING_TEXT = ('', 'nan', 'none', 'n/a') # Cells that hold no value, e.g. a rule set that could not be computed
+
+def _sort_keys(values): # (keys, missing mask): numeric keys for values like "1,234" or "41.5%", text keys only if real text is present
+    values = pd.Series(values, dtype=object)
+    text = values.map(lambda v: '' if v is None or v != v else str(v)) # NaN/None -> '' so every key is a str
+    missing = text.str.strip().str.lower().isin(MISSING_TEXT).to_numpy()
+    numeric = pd.to_numeric(text.str.replace(r'[,%]', '', regex=True), errors='coerce').to_numpy(dtype=float)
+    if np.isnan(numeric[~missing]).any(): # Genuinely non-numeric text somewhere: the whole column sorts as text
+        return text.mask(missing, '').to_numpy(dtype=object), missing
+    return numeric, missing
+
+def rows_at(df, positions, start, count, columns): # Materialises only the visible window as lists of display strings
+    window = positions[start:start + count]
+    if len(window) == 0: return []
+    block = df.iloc[window][columns]
+    return [[str(v) for v in row] for row in block.itertuples(index=False, name=None)]
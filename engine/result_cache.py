@@ -0,0 +1,70 @@
+# --- engine/result_cache.py ---
+
+import os
+import json
+import pickle
+import hashlib
+import pandas as pd
+from engine.atomic_file import atomic_write
+
+# Which rule sections feed each analysis type. Swing only reads indicators built from
+# 'swing_rules'; Momentum also reads EMA_50/EMA_200/RSI_14 which are built from 'swing_rules'.
+TASK_RULE_SECTIONS = {
+    'Swing': ('swing_rules',),
+    'Momentum': ('swing_rules', 'momentum_rules'),
+}
+
+#---------- # FINGERPRINT HELPERS ----------
+
+def fingerprint(*parts): # Stable SHA1 over any JSON-serialisable parts (dict keys are sorted)
+    payload = json.dumps(parts, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha1(payload).hexdigest()
+
+def file_signature(path): # Cheap "version" of a data file: size + modification time
+    try:
+        st = os.stat(path)
+        return f"{st.st_size}-{st.st_mtime_ns}"
+    except OSError:
+        return None
+
+def frame_fingerprint(df): # Content hash of a single symbol's OHLCV frame (index included)
+    row_hashes = pd.util.hash_pandas_object(df, index=True).values
+    return hashlib.sha1(row_hashes.tobytes()).hexdigest()
+
+def rules_fingerprint(config, analysis_type): # Hash of only the rule sections this analysis type depends on
+    sections = TASK_RULE_SECTIONS.get(analysis_type, ('swing_rules', 'momentum_rules'))
+    return fingerprint({s: config.get(s, {}) for s in sections})
+
+#---------- # ON-DISK STORE ----------
+# One report file and one per-symbol file per task. Each holds the key it was built for,
+# so a lookup is a hit only when the stored key matches the current fingerprint.
+
+def _cache_path(cache_dir, task_name, kind):
+    return os.path.join(cache_dir, f"{task_name}_{kind}.pkl")
+
+def _read(path):
+    try:
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+
+def _write(path, obj): # Write to a temp file then swap in, so a crash never leaves a torn cache file
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    atomic_write(path, lambda f: pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL))
+
+def load_report(cache_dir, task_name, task_key): # Returns the cached wide report, or None on a miss
+    entry = _read(_cache_path(cache_dir, task_name, 'report'))
+    if not entry or entry.get('key') != task_key:
+        return None
+    return entry['report']
+
+def save_report(cache_dir, task_name, task_key, report_df):
+    _write(_cache_path(cache_dir, task_name, 'report'), {'key': task_key, 'report': report_df})
+
+def load_symbol_results(cache_dir, task_name): # Returns {symbol: (symbol_key, [signal dicts])}
+    entry = _read(_cache_path(cache_dir, task_name, 'symbols'))
+    return entry if isinstance(entry, dict) else {}
+
+def save_symbol_results(cache_dir, task_name, symbol_results):
+    _write(_cache_path(cache_dir, task_name, 'symbols'), symbol_results)
@@ -0,0 +1,309 @@
+# --- engine/rule_dsl.py ---
+
+import re
+import operator
+import numpy as np
+import pandas as pd
+from engine import kernels
+
+# Declarative rules for custom strategies, configured in config.json under "rule_sets":
+#
+#     "PULLBACK": {"rules": {"Trend": "Close > EMA(50) and Close > EMA(200)",
+#                            "RSI Zone": "RSI(14) between 45 and 60",
+#                            "Volume Surge": "Volume > 1.5 * SMA(Volume, 20)"}}
+#
+# Grammar (keywords are case-insensitive):
+#     expr       := and_expr ('or' and_expr)*
+#     and_expr   := not_expr ('and' not_expr)*
+#     not_expr   := 'not' not_expr | comparison
+#     comparison := arith [('>' | '>=' | '<' | '<=' | '==' | '!=') arith | 'between' arith 'and' arith]
+#     arith      := term (('+' | '-') term)*
+#     term       := factor (('*' | '/') factor)*
+#     factor     := NUMBER | '-' factor | '(' expr ')' | FIELD | FUNC '(' args ')'
+#
+# FIELD is one of Open, High, Low, Close, Volume or Delivery (latest delivery %). Every rule is parsed once,
+# the indicator calls it needs are collected (and de-duplicated across all rule sets), each indicator is
+# computed once as a (dates x symbols) frame for the whole universe, and the rules are then evaluated as
+# NumPy expressions over the latest bar of every symbol at once.
+
+FIELDS = ('Open', 'High', 'Low', 'Close', 'Volume', 'Delivery')
+_COMPARISONS = {'>': operator.gt, '>=': operator.ge, '<': operator.lt, '<=': operator.le, '==': operator.eq, '!=': operator.ne}
+_ARITHMETIC = {'+': operator.add, '-': operator.sub, '*': operator.mul, '/': operator.truediv}
+_TOKEN_RE = re.compile(r"\s*(?:(\d+\.\d*|\.\d+|\d+)|([A-Za-z_][A-Za-z_0-9]*)|(>=|<=|==|!=|[><()+\-*/,]))")
+
+#---------- # VECTORISED INDICATORS (each takes/returns a dates x symbols DataFrame) ----------
+# Same formulas as engine/indicators.py, applied to every symbol column at once (RSI/ATR/ADX via engine/kernels.py).
+
+def _ema(series, period): return series.ewm(span=period, adjust=False).mean()
+
+def _sma(series, period): return series.rolling(window=period).mean()
+
+def _panel_kernel(kernel, *frames_and_period): # Runs a fused kernel from engine/kernels.py and re-labels the result
+    *frames, period = frames_and_period
+    values = kernel(*(f.to_numpy(dtype=float) for f in frames), period)
+    return pd.DataFrame(values, index=frames[0].index, columns=frames[0].columns)
+
+def _rsi(close, period=14): return _panel_kernel(kernels.rsi, close, period)
+
+def _atr(high, low, close, period=14): return _panel_kernel(kernels.atr, high, low, close, period)
+
+def _adx(high, low, close, period=14): return _panel_kernel(kernels.adx, high, low, close, period)
+
+def _vwap(high, low, close, volume, period=60):
+    typical_price_vol = (close + high + low) / 3 * volume
+    return typical_price_vol.rolling(window=period).sum() / volume.rolling(window=period).sum()
+
+# name -> (function, OHLCV fields passed first, whether the first argument may be any series, (min, max) periods)
+INDICATORS = {
+    'EMA':     (_ema, ('Close',), True, (1, 1)),
+    'SMA':     (_sma, ('Close',), True, (1, 1)),
+    'HIGHEST': (lambda s, n: s.rolling(window=n).max(), ('High',), True, (1, 1)),
+    'LOWEST':  (lambda s, n: s.rolling(window=n).min(), ('Low',), True, (1, 1)),
+    'PREV':    (lambda s, n=1: s.shift(n), ('Close',), True, (0, 1)),
+    'RSI':     (_rsi, ('Close',), True, (0, 1)),
+    'ATR':     (_atr, ('High', 'Low', 'Close'), False, (0, 1)),
+    'ADX':     (_adx, ('High', 'Low', 'Close'), False, (0, 1)),
+    'VWAP':    (_vwap, ('High', 'Low', 'Close', 'Volume'), False, (0, 1)),
+}
+
+#---------- # PARSER ----------
+
+def _tokenize(text):
+    tokens, pos = [], 0
+    text = text.strip()
+    while pos < len(text):
+        match = _TOKEN_RE.match(text, pos)
+        if not match or match.end() == pos:
+            raise ValueError(f"Unexpected character at position {pos} in rule '{text}'")
+        number, name, symbol = match.groups()
+        if number is not None: tokens.append(('num', float(number)))
+        elif name is not None: tokens.append(('name', name))
+        elif symbol is not None: tokens.append(('op', symbol))
+        pos = match.end()
+    return tokens
+
+class _Parser:
+    def __init__(self, text):
+        self.text, self.tokens, self.i = text, _tokenize(text), 0
+
+    def _peek(self): return self.tokens[self.i] if self.i < len(self.tokens) else (None, None)
+
+    def _is_keyword(self, word):
+        kind, value = self._peek()
+        return kind == 'name' and value.lower() == word
+
+    def _expect(self, value):
+        kind, tok = self._peek()
+        if tok != value and not (kind == 'name' and str(tok).lower() == value):
+            raise ValueError(f"Expected '{value}' in rule '{self.text}'")
+        self.i += 1
+
+    def parse(self):
+        node = self._or()
+        if self.i != len(self.tokens):
+            raise ValueError(f"Unexpected '{self._peek()[1]}' in rule '{self.text}'")
+        return node
+
+    def _or(self):
+        node = self._and()
+        while self._is_keyword('or'):
+            self.i += 1; node = ('or', node, self._and())
+        return node
+
+    def _and(self):
+        node = self._not()
+        while self._is_keyword('and'):
+            self.i += 1; node = ('and', node, self._not())
+        return node
+
+    def _not(self):
+        if self._is_keyword('not'):
+            self.i += 1; return ('not', self._not())
+        return self._comparison()
+
+    def _comparison(self):
+        left = self._arith()
+        kind, tok = self._peek()
+        if kind == 'op' and tok in _COMPARISONS:
+            self.i += 1; return ('cmp', tok, left, self._arith())
+        if self._is_keyword('between'):
+            self.i += 1; low = self._arith(); self._expect('and'); high = self._arith()
+            return ('between', left, low, high)
+        return left
+
+    def _arith(self):
+        node = self._term()
+        while self._peek()[1] in ('+', '-') and self._peek()[0] == 'op':
+            op = self.tokens[self.i][1]; self.i += 1; node = ('bin', op, node, self._term())
+        return node
+
+    def _term(self):
+        node = self._factor()
+        while self._peek()[1] in ('*', '/') and self._peek()[0] == 'op':
+            op = self.tokens[self.i][1]; self.i += 1; node = ('bin', op, node, self._factor())
+        return node
+
+    def _factor(self):
+        kind, tok = self._peek()
+        if kind == 'num':
+            self.i += 1; return ('num', tok)
+        if tok == '-' and kind == 'op':
+            self.i += 1; return ('neg', self._factor())
+        if tok == '(' and kind == 'op':
+            self.i += 1; node = self._or(); self._expect(')'); return node
+        if kind == 'name':
+            self.i += 1
+            field = next((f for f in FIELDS if f.lower() == tok.lower()), None)
+            if self._peek()[1] != '(':
+                if field is None: raise ValueError(f"Unknown field '{tok}' in rule '{self.text}'")
+                return ('field', field)
+            func = tok.upper()
+            if func not in INDICATORS: raise ValueError(f"Unknown indicator '{tok}' in rule '{self.text}'")
+            self.i += 1; args = []
+            if self._peek()[1] != ')':
+                args.append(self._arith())
+                while self._peek()[1] == ',':
+                    self.i += 1; args.append(self._arith())
+            self._expect(')')
+            return self._call_node(func, args)
+        raise ValueError(f"Unexpected end of rule '{self.text}'")
+
+    def _call_node(self, func, args): # Normalises e.g. EMA(50) -> EMA(Close, 50) so equal calls share one key
+        _, default_fields, takes_series, (min_periods, max_periods) = INDICATORS[func]
+        series_args = [a for a in args if a[0] != 'num']
+        periods = tuple(int(a[1]) if float(a[1]).is_integer() else a[1] for a in args if a[0] == 'num')
+        if series_args and not takes_series:
+            raise ValueError(f"{func}() only takes a period in rule '{self.text}'")
+        if len(series_args) > 1 or (series_args and args[0][0] == 'num'):
+            raise ValueError(f"{func}() takes at most one series, as its first argument, in rule '{self.text}'")
+        if not min_periods <= len(periods) <= max_periods:
+            expected = f"{min_periods}" if min_periods == max_periods else f"{min_periods} to {max_periods}"
+            raise ValueError(f"{func}() takes {expected} period argument(s), got {len(periods)}, in rule '{self.text}'")
+        if any(not float(p).is_integer() or p < 1 for p in periods):
+            raise ValueError(f"{func}() periods must be whole numbers of at least 1 in rule '{self.text}'")
+        source = series_args[0] if series_args else ('field', default_fields[0])
+        return ('call', func, source, periods)
+
+def parse_rule(text): # Parses one rule expression into a tuple AST; raises ValueError on bad syntax
+    return _Parser(str(text)).parse()
+
+def required_indicators(nodes): # Unique indicator call nodes needed by the given ASTs (nested calls first)
+    found = {}
+    def walk(node):
+        if node[0] == 'call':
+            walk(node[2])
+            found.setdefault(node, None)
+        else:
+            for child in node[1:]:
+                if isinstance(child, tuple): walk(child)
+    for node in nodes: walk(node)
+    return list(found)
+
+def compile_rule_sets(rule_sets): # {set name: {rule name: expression}} -> {set name: [(rule name, text, AST)]}
+    compiled = {}
+    for set_name, spec in rule_sets.items():
+        rules = spec.get('rules', spec) if isinstance(spec, dict) else {}
+        compiled[set_name] = [(rule_name, text, parse_rule(text)) for rule_name, text in rules.items()]
+        if not compiled[set_name]:
+            raise ValueError(f"Rule set '{set_name}' has no rules")
+    return compiled
+
+#---------- # EVALUATION ----------
+
+def _series_value(node, fields, computed): # Full-history (dates x symbols) value of an arithmetic node
+    kind = node[0]
+    if kind == 'num': return node[1]
+    if kind == 'field': return fields[node[1]]
+    if kind == 'call': return computed[node]
+    if kind == 'neg': return -_series_value(node[1], fields, computed)
+    if kind == 'bin':
+        return _ARITHMETIC[node[1]](_series_value(node[2], fields, computed), _series_value(node[3], fields, computed))
+    raise ValueError("Boolean expressions cannot be used as indicator inputs")
+
+def _compute_indicators(calls, fields): # Computes every unique call once for the whole universe
+    computed = {}
+    for call in calls:
+        _, func_name, source, periods = call
+        func, default_fields, takes_series, _ = INDICATORS[func_name]
+        if takes_series:
+            computed[call] = func(_series_value(source, fields, computed), *periods)
+        else:
+            computed[call] = func(*(fields[f] for f in default_fields), *periods)
+    return computed
+
+def _latest(value, last_pos): # Gathers each symbol's value at its own latest bar -> 1-D array
+    if isinstance(value, pd.DataFrame):
+        arr = value.to_numpy(dtype=float)
+        return arr[last_pos, np.arange(arr.shape[1])]
+    return value
+
+def _evaluate(node, latest): # Evaluates a rule AST on per-symbol latest values; arithmetic -> float array, logic -> bool array
+    kind = node[0]
+    if kind == 'num': return node[1]
+    if kind in ('field', 'call'): return latest[node]
+    if kind == 'neg': return -_evaluate(node[1], latest)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if kind == 'bin': return _ARITHMETIC[node[1]](_evaluate(node[2], latest), _evaluate(node[3], latest))
+        if kind == 'cmp': return _COMPARISONS[node[1]](_evaluate(node[2], latest), _evaluate(node[3], latest))
+        if kind == 'between':
+            value = _evaluate(node[1], latest)
+            return (value >= _evaluate(node[2], latest)) & (value <= _evaluate(node[3], latest))
+    if kind == 'and': return np.logical_and(_evaluate(node[1], latest), _evaluate(node[2], latest))
+    if kind == 'or': return np.logical_or(_evaluate(node[1], latest), _evaluate(node[2], latest))
+    if kind == 'not': return np.logical_not(_evaluate(node[1], latest))
+    raise ValueError(f"Unknown rule node '{kind}'")
+
+def _format_values(value, n): # Display strings for a per-symbol array (or a scalar repeated n times)
+    arr = np.broadcast_to(np.asarray(value), (n,))
+    if arr.dtype == bool: return [str(v) for v in arr]
+    return [f"{v:,.2f}" if np.isfinite(v) else "nan" for v in arr.astype(float)]
+
+def _describe(node, latest, n): # Per-symbol (ThresholdValue, CurrentValue) strings, in the style of the built-in rules
+    if node[0] == 'cmp':
+        return [f"{node[1]} {v}" for v in _format_values(_evaluate(node[3], latest), n)], _format_values(_evaluate(node[2], latest), n)
+    if node[0] == 'between':
+        lows, highs = _format_values(_evaluate(node[2], latest), n), _format_values(_evaluate(node[3], latest), n)
+        return [f"{lo}-{hi}" for lo, hi in zip(lows, highs)], _format_values(_evaluate(node[1], latest), n)
+    return ["True"] * n, _format_values(np.asarray(_evaluate(node, latest), dtype=bool), n)
+
+def evaluate_rule_sets(compiled, field_frames, delivery=None):
+    """
+    Evaluates compiled rule sets on the latest bar of every symbol in one pass.
+
+    Args:
+        compiled (dict): Output of compile_rule_sets (any subset of it).
+        field_frames (dict): {'Open'|'High'|'Low'|'Close'|'Volume': dates x symbols DataFrame}, same columns in each.
+        delivery (pd.Series): Latest delivery % indexed by symbol (missing symbols count as 0).
+
+    Returns:
+        dict: {set name: list of signal dicts (Criteria, SignalBool, ThresholdValue, CurrentValue, Symbol)}
+    """
+    close = field_frames['Close']
+    symbols = list(close.columns)
+    fields = dict(field_frames)
+    delivery_values = (delivery.reindex(symbols).fillna(0.0) if delivery is not None else pd.Series(0.0, index=symbols)).to_numpy(dtype=float)
+    fields['Delivery'] = pd.DataFrame(np.broadcast_to(delivery_values, close.shape), index=close.index, columns=symbols)
+
+    all_rules = [ast for rules in compiled.values() for _, _, ast in rules]
+    computed = _compute_indicators(required_indicators(all_rules), fields)
+
+    # Each symbol's latest bar is its last row with a Close (symbols can stop trading before the panel ends)
+    valid = close.notna().to_numpy()
+    has_data = valid.any(axis=0)
+    last_pos = np.where(has_data, len(valid) - 1 - np.argmax(valid[::-1], axis=0), 0)
+    latest = {('field', f): _latest(v, last_pos) for f, v in fields.items()}
+    latest.update({call: _latest(v, last_pos) for call, v in computed.items()})
+
+    n = len(symbols)
+    results = {}
+    for set_name, rules in compiled.items():
+        columns = []
+        for number, (rule_name, _, ast) in enumerate(rules, start=1):
+            passed = np.broadcast_to(np.asarray(_evaluate(ast, latest), dtype=bool), (n,))
+            thresholds, currents = _describe(ast, latest, n)
+            columns.append((f"{number}. {rule_name}", passed, thresholds, currents))
+        results[set_name] = [
+            {'Criteria': criteria, 'SignalBool': bool(passed[i]), 'ThresholdValue': thresholds[i], 'CurrentValue': currents[i], 'Symbol': symbols[i]}
+            for i in np.flatnonzero(has_data) for criteria, passed, thresholds, currents in columns
+        ]
+    return results
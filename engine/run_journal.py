@@ -0,0 +1,55 @@
+# --- engine/run_journal.py ---
+
+import os
+import pickle
+
+# Append-only journal of per-symbol analysis results, so a stopped or crashed run can pick up where it left off.
+# One file per task: a header record holding the task fingerprint, then one record per completed chunk of
+# symbols. Each chunk is flushed and fsync'ed before the run moves on, so at most one chunk is lost on a crash.
+# A torn final record (crash mid-write) is ignored on load; a header for different inputs discards the journal.
+
+def _journal_path(journal_dir, task_name):
+    return os.path.join(journal_dir, f"{task_name}.journal")
+
+def load_journal(journal_dir, task_name, task_key): # {symbol: (symbol_key, results)} completed by an earlier run with the same inputs
+    completed = {}
+    try:
+        with open(_journal_path(journal_dir, task_name), 'rb') as f:
+            header = pickle.load(f)
+            if not isinstance(header, dict) or header.get('key') != task_key:
+                return {}
+            while True:
+                for symbol, symbol_key, results in pickle.load(f):
+                    completed[symbol] = (symbol_key, results)
+    except (OSError, EOFError, pickle.UnpicklingError, ValueError, TypeError):
+        pass # Missing journal, clean end of file, or a torn last chunk: keep what was read so far
+    return completed
+
+class RunJournal:
+    def __init__(self, journal_dir, task_name, task_key, completed=None):
+        os.makedirs(journal_dir, exist_ok=True)
+        self.path = _journal_path(journal_dir, task_name)
+        self.pending = []
+        # Rewrite the journal with the header and anything being carried over, dropping any torn tail
+        with open(self.path, 'wb') as f:
+            pickle.dump({'key': task_key}, f, protocol=pickle.HIGHEST_PROTOCOL)
+            if completed:
+                pickle.dump([(s, k, r) for s, (k, r) in completed.items()], f, protocol=pickle.HIGHEST_PROTOCOL)
+            f.flush(); os.fsync(f.fileno())
+
+    def add(self, symbol, symbol_key, results):
+        self.pending.append((symbol, symbol_key, results))
+
+    def flush(self): # Appends the pending chunk durably
+        if not self.pending: return
+        with open(self.path, 'ab') as f:
+            pickle.dump(self.pending, f, protocol=pickle.HIGHEST_PROTOCOL)
+            f.flush(); os.fsync(f.fileno())
+        self.pending = []
+
+    def close(self, completed): # Task finished: drop the journal (its results now live in the result cache), else keep it for resume
+        if completed:
+            try: os.remove(self.path)
+            except OSError: pass
+        else:
+            self.flush()
@@ -0,0 +1,94 @@
+# --- engine/shard_worker.py ---
+
+import os
+import sys
+import time
+import socket
+import argparse
+from engine import work_queue
+
+# Worker side of a sharded scan. Each shard task names an OHLCV panel, a slice of the universe and the rules to
+# apply; the worker maps the panel (see panel_store), runs the built-in checklist for its symbols and returns the
+# signals as columns (one list per field) rather than one dict per criterion, which keeps results small on the wire.
+# The panel path in the task must be reachable from the worker, e.g. a shared mount at the same path on every host.
+#
+#     python -m engine.shard_worker --queue-dir /mnt/scan/queue [--idle-exit 60]
+
+RESULT_COLUMNS = ['Symbol', 'Criteria', 'SignalBool', 'ThresholdValue', 'CurrentValue']
+HEARTBEAT_EVERY = 25 # Symbols between heartbeats, so long shards are not mistaken for dead workers
+
+def process_shard(payload, heartbeat=None):
+    """
+    Runs the built-in checklist for one shard.
+
+    Args:
+        payload (dict): Shard task written by Engine: ohlcv_path, symbols, analysis_type, swing_rules,
+                        momentum_rules, min_score, rules_key and delivery ({symbol: delivery %}).
+        heartbeat (callable): Called every HEARTBEAT_EVERY symbols while the shard is being processed.
+
+    Returns:
+        dict: {'columns': {column: list}, 'keys': {symbol: symbol cache key}, 'pruned': int, 'error': str or None}
+    """
+    from engine import indicators, panel_store, result_cache
+    columns = {col: [] for col in RESULT_COLUMNS}
+    keys = {}; pruned = 0
+
+    panel = panel_store.open_panel(payload['ohlcv_path'])
+    if panel is None:
+        return {'columns': columns, 'keys': keys, 'pruned': 0, 'error': f"No up-to-date panel for '{payload['ohlcv_path']}'"}
+    recursive = indicators.compute_recursive_indicators(panel.field_frames(payload['symbols']), payload['swing_rules'])
+
+    for i, symbol in enumerate(payload['symbols']):
+        if heartbeat is not None and i % HEARTBEAT_EVERY == 0: heartbeat()
+        try:
+            stock_df = panel.symbol_frame(symbol)
+            if stock_df.empty or stock_df.isnull().all().all(): continue
+        except KeyError: continue
+
+        delivery_perc = payload['delivery'].get(symbol, 0.0)
+        signals, was_pruned = indicators.analyze_symbol(stock_df, payload['analysis_type'], payload['swing_rules'], payload['momentum_rules'],
+                                                        delivery_perc=delivery_perc, min_score=payload['min_score'], precomputed=recursive.get(symbol))
+        pruned += was_pruned
+        keys[symbol] = result_cache.fingerprint(payload['rules_key'], float(delivery_perc), result_cache.frame_fingerprint(stock_df))
+        for signal in signals:
+            columns['Symbol'].append(symbol)
+            for col in RESULT_COLUMNS[1:]: columns[col].append(signal[col])
+    columns['SignalBool'] = [bool(v) for v in columns['SignalBool']]
+    return {'columns': columns, 'keys': keys, 'pruned': pruned, 'error': None}
+
+def run_worker(queue, worker_id, idle_exit=0, poll_interval=1.0, log_func=print):
+    """Claims and processes shards until the queue has been empty for `idle_exit` seconds (0 = run forever)."""
+    idle_since = time.monotonic()
+    while True:
+        claimed = queue.claim()
+        if claimed is None:
+            if idle_exit and time.monotonic() - idle_since > idle_exit: return
+            time.sleep(poll_interval); continue
+
+        job_id, shard_id, payload = claimed
+        started = time.monotonic()
+        try:
+            result = process_shard(payload, heartbeat=lambda: queue.heartbeat(job_id, shard_id))
+        except Exception as e: # Reported to the coordinator instead of killing the worker
+            result = {'columns': {col: [] for col in RESULT_COLUMNS}, 'keys': {}, 'pruned': 0, 'error': f"{type(e).__name__}: {e}"}
+        result['worker'] = worker_id
+        queue.complete(job_id, shard_id, result)
+        log_func(f"[{worker_id}] {job_id} shard {shard_id}: {len(payload['symbols'])} symbols in {time.monotonic() - started:.1f}s" + (f" (ERROR: {result['error']})" if result['error'] else ""))
+        idle_since = time.monotonic()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Process scan shards from a work queue.")
+    parser.add_argument('--queue-dir', required=True, help="Root of the work queue shared with the coordinator.")
+    parser.add_argument('--transport', default='directory', choices=sorted(work_queue.TRANSPORTS))
+    parser.add_argument('--idle-exit', type=float, default=0, help="Exit after this many idle seconds (0 = run until killed).")
+    parser.add_argument('--worker-id', default=f"{socket.gethostname()}-{os.getpid()}")
+    args = parser.parse_args(argv)
+    queue = work_queue.open_queue({'transport': args.transport, 'queue_dir': os.path.abspath(args.queue_dir)}, os.getcwd())
+    try:
+        run_worker(queue, args.worker_id, idle_exit=args.idle_exit)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
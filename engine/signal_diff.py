@@ -0,0 +1,135 @@
+# --- engine/signal_diff.py ---
+
+import os
+import json
+import pandas as pd
+from datetime import datetime
+from engine import report_view, result_cache
+from engine.atomic_file import atomic_write
+
+# Day-over-day changes between analysis runs. Each export stores a compact snapshot of every report (per stock:
+# score and a '1'/'0' string of criterion outcomes) and compares it with the snapshot of the previous *run*.
+# Snapshots are keyed on the run id the analysis stores in each report (attrs['run_id']), so exporting the same
+# run again reproduces the same delta instead of an empty one, while a new run whose report did not change (a
+# result-cache hit) gets an empty delta rather than a copy of the last one. Only the differences are written:
+#     <run date>_<HHMM>_Signal_Delta.json  new / dropped / changed stocks per task, plus per-criterion flip counts
+#     history/signal_history.jsonl         the same changes, one JSON line each, appended once per run
+#     history/last_snapshot.json           per task: the latest run's snapshot and the one before it
+# Reports narrowed by a minimum score or top-K are tracked separately per filter, so changing the filter never
+# shows up as stocks being dropped or added.
+
+def snapshot(report_df): # {'criteria': [names], 'stocks': {stock: [score, '1011...']}} for one wide report
+    if report_df.empty or 'Stock' not in report_df.columns: return {'criteria': [], 'stocks': {}}
+    criteria = report_view.criterion_columns(report_df)
+    scores = report_view.score_values(report_df)
+    flags = [report_df[col].to_numpy() == 'TRUE' for _, col in criteria]
+    stocks = {str(stock): [int(scores[i]), ''.join('1' if f[i] else '0' for f in flags)] for i, stock in enumerate(report_df['Stock'])}
+    return {'criteria': [name for name, _ in criteria], 'stocks': stocks}
+
+def diff_snapshots(previous, current):
+    """
+    Compares two snapshots of the same task.
+
+    Returns:
+        dict: 'new' and 'dropped' ([{Stock, Score}]), 'changed' ([{Stock, Old Score, New Score, Gained, Lost}] for
+              stocks whose score or any criterion changed) and 'criteria' ({criterion: {'gained': n, 'lost': n}})
+    """
+    prev_stocks, curr_stocks = previous.get('stocks', {}), current.get('stocks', {})
+    names = current.get('criteria', [])
+    same_criteria = previous.get('criteria', []) == names # Rule edits rename criteria; then only scores are compared
+    delta = {
+        'new': [{'Stock': s, 'Score': curr_stocks[s][0]} for s in sorted(curr_stocks.keys() - prev_stocks.keys())],
+        'dropped': [{'Stock': s, 'Score': prev_stocks[s][0]} for s in sorted(prev_stocks.keys() - curr_stocks.keys())],
+        'changed': [],
+        'criteria': {},
+    }
+    for stock in sorted(curr_stocks.keys() & prev_stocks.keys()):
+        (old_score, old_flags), (new_score, new_flags) = prev_stocks[stock], curr_stocks[stock]
+        gained, lost = [], []
+        if same_criteria and old_flags != new_flags:
+            for name, old, new in zip(names, old_flags, new_flags):
+                if old == new: continue
+                (gained if new == '1' else lost).append(name)
+                counts = delta['criteria'].setdefault(name, {'gained': 0, 'lost': 0})
+                counts['gained' if new == '1' else 'lost'] += 1
+        if old_score != new_score or gained or lost:
+            delta['changed'].append({'Stock': stock, 'Old Score': old_score, 'New Score': new_score, 'Gained': gained, 'Lost': lost})
+    return delta
+
+def _write_json(path, obj): # Atomic so a crash never leaves a half-written snapshot behind
+    atomic_write(path, lambda f: json.dump(obj, f, separators=(',', ':')), binary=False)
+
+def _snapshot_key(task_name, report_filter): # Full reports keep the plain task name
+    active = {k: v for k, v in (report_filter or {}).items() if v}
+    return task_name if not active else f"{task_name} [{', '.join(f'{k}={v}' for k, v in sorted(active.items()))}]"
+
+def export_changes(reports_dict, output_dir, log_func):
+    """
+    Writes the delta file for the latest runs, appends new changes to the history and stores the snapshots.
+    Partial reports (analysis stopped part-way, or shards that failed) are skipped so they never become the baseline.
+
+    Returns:
+        str: Path of the delta file written
+    """
+    history_dir = os.path.join(output_dir, 'history')
+    os.makedirs(history_dir, exist_ok=True)
+    snapshot_path = os.path.join(history_dir, 'last_snapshot.json')
+    try:
+        with open(snapshot_path, 'r') as f:
+            snapshots = json.load(f)
+    except (OSError, ValueError):
+        snapshots = {} # First export: every stock shows up as new
+
+    now = datetime.now().strftime("%Y-%m-%d %H:%M")
+    delta_file = {'date': now, 'tasks': {}}
+    history_lines = []
+    for task_name, df in reports_dict.items():
+        if df.attrs.get('partial'):
+            log_func(f"INFO: '{task_name}' is a partial report. Leaving it out of the change tracking.", 'INFO'); continue
+        run_key = df.attrs.get('run_id') or (result_cache.frame_fingerprint(df) if not df.empty else 'empty') # Content for reports built elsewhere
+        key = _snapshot_key(task_name, df.attrs.get('filter'))
+        stored = snapshots.get(key, {})
+        if stored.get('run') == run_key: # Same run exported again: same baseline, same delta, nothing new for the history
+            previous, current, new_run = stored.get('previous') or {}, stored['current'], False
+        else:
+            previous, current, new_run = stored.get('current') or {}, snapshot(df), True
+            current['date'] = now
+            snapshots[key] = {'run': run_key, 'previous': previous, 'current': current}
+        delta = diff_snapshots(previous, current)
+        delta['date'], delta['previous_date'] = current['date'], previous.get('date')
+        delta_file['tasks'][task_name] = delta
+        if new_run:
+            for change in ('new', 'dropped', 'changed'):
+                for entry in delta[change]:
+                    history_lines.append(json.dumps({'date': current['date'], 'task': task_name, 'change': change, **entry}))
+        log_func(f"INFO: {task_name}: {len(delta['new'])} new, {len(delta['dropped'])} dropped, {len(delta['changed'])} changed since {delta['previous_date'] or 'the first export'}.", 'INFO')
+
+    # Named after the newest run included, so re-exporting a run rewrites its own file rather than another day's
+    run_date = max((d['date'] for d in delta_file['tasks'].values()), default=now)
+    delta_path = os.path.join(output_dir, f"{run_date.replace(' ', '_').replace(':', '')}_Signal_Delta.json")
+    _write_json(delta_path, delta_file)
+    if history_lines:
+        with open(os.path.join(history_dir, 'signal_history.jsonl'), 'a') as f:
+            f.write('\n'.join(history_lines) + '\n')
+    _write_json(snapshot_path, snapshots) # Last, so a failed export is compared against the same baseline next time
+    log_func(f"SUCCESS: Wrote {sum(len(d['new']) + len(d['dropped']) + len(d['changed']) for d in delta_file['tasks'].values())} changes to '{delta_path}'.", 'SUCCESS')
+    return delta_path
+
+HISTORY_COLUMNS = ['Date', 'Task', 'Change', 'Stock', 'Score', 'Old Score', 'Gained', 'Lost']
+
+def load_history(output_dir): # Every change ever exported, newest first, as one flat frame for the results viewer
+    path = os.path.join(output_dir, 'history', 'signal_history.jsonl')
+    try:
+        history = pd.read_json(path, lines=True, dtype=False)
+    except (OSError, ValueError):
+        return pd.DataFrame(columns=HISTORY_COLUMNS)
+    if history.empty: return pd.DataFrame(columns=HISTORY_COLUMNS)
+    history = history.rename(columns={'date': 'Date', 'task': 'Task', 'change': 'Change'})
+    for col in ('Score', 'Old Score', 'New Score', 'Gained', 'Lost'):
+        if col not in history.columns: history[col] = None
+    history['Score'] = history['New Score'].where(history['Change'] == 'changed', history['Score']) # Score after the change
+    for col in ('Gained', 'Lost'):
+        history[col] = history[col].map(lambda names: ', '.join(names) if isinstance(names, list) else '')
+    for col in ('Score', 'Old Score'): # Whole numbers, blank where a change has no such score
+        history[col] = pd.to_numeric(history[col], errors='coerce').map(lambda v: '' if pd.isna(v) else int(v))
+    return history[HISTORY_COLUMNS].iloc[::-1].reset_index(drop=True)
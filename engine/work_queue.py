@@ -0,0 +1,111 @@
+# --- engine/work_queue.py ---
+
+import os
+import time
+import pickle
+from engine.atomic_file import atomic_write
+
+# Work queue between a scan coordinator and shard workers. A transport moves shard tasks (coordinator -> workers)
+# and shard results (workers -> coordinator); the coordinator and workers only use the methods below, so another
+# transport (Redis, SQS, ...) can be plugged in by adding a class with the same methods to TRANSPORTS.
+#
+# DirectoryQueue is the local stand-in: plain files under one root, which works on a single box or across hosts
+# that share a mount. Claims are atomic renames, so two workers never take the same shard.
+#     pending/<job>.<shard>.task   waiting for a worker
+#     claimed/<job>.<shard>.task   being worked on; its mtime is the worker's heartbeat
+#     results/<job>/<shard>.result finished shard, written atomically
+
+def _dump(path, obj): # Atomic pickle write: readers never see a half-written file
+    atomic_write(path, lambda f: pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL))
+
+def _load(path):
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+class DirectoryQueue:
+    def __init__(self, root):
+        self.root = root
+        self.pending_dir = os.path.join(root, 'pending')
+        self.claimed_dir = os.path.join(root, 'claimed')
+        self.results_dir = os.path.join(root, 'results')
+        for path in (self.pending_dir, self.claimed_dir, self.results_dir):
+            os.makedirs(path, exist_ok=True)
+
+    def submit(self, job_id, shards): # Publishes {shard_id: payload} for a job; job ids must not contain '.'
+        os.makedirs(os.path.join(self.results_dir, job_id), exist_ok=True)
+        for shard_id, payload in shards.items():
+            _dump(os.path.join(self.pending_dir, f"{job_id}.{shard_id}.task"), payload)
+
+    def claim(self): # (job_id, shard_id, payload) of the next waiting shard, or None if there is none
+        for name in sorted(os.listdir(self.pending_dir)):
+            if not name.endswith('.task'): continue
+            claimed_path = os.path.join(self.claimed_dir, name)
+            try:
+                os.rename(os.path.join(self.pending_dir, name), claimed_path)
+            except OSError:
+                continue # Another worker got there first
+            os.utime(claimed_path)
+            job_id, shard_id, _ = name.split('.')
+            try:
+                return job_id, shard_id, _load(claimed_path)
+            except (OSError, EOFError, pickle.UnpicklingError):
+                self._drop_claim(job_id, shard_id) # Cancelled or unreadable: nothing to do
+        return None
+
+    def heartbeat(self, job_id, shard_id): # Marks a claimed shard as still being worked on
+        try: os.utime(os.path.join(self.claimed_dir, f"{job_id}.{shard_id}.task"))
+        except OSError: pass
+
+    def complete(self, job_id, shard_id, result):
+        job_dir = os.path.join(self.results_dir, job_id)
+        if os.path.isdir(job_dir): # Skipped if the coordinator cancelled the job meanwhile
+            _dump(os.path.join(job_dir, f"{shard_id}.result"), result)
+        self._drop_claim(job_id, shard_id)
+
+    def collect(self, job_id, seen=()): # {shard_id: result} for finished shards not already in `seen`
+        results = {}
+        try: names = os.listdir(os.path.join(self.results_dir, job_id))
+        except OSError: return results
+        for name in names:
+            shard_id, ext = os.path.splitext(name)
+            if ext != '.result' or shard_id in seen: continue
+            try: results[shard_id] = _load(os.path.join(self.results_dir, job_id, name))
+            except (OSError, EOFError, pickle.UnpicklingError): pass # Picked up on the next poll
+        return results
+
+    def requeue_stale(self, job_id, timeout): # Puts back shards whose worker stopped heartbeating; returns how many
+        requeued, cutoff = 0, time.time() - timeout
+        for name in os.listdir(self.claimed_dir):
+            if not name.startswith(f"{job_id}."): continue
+            path = os.path.join(self.claimed_dir, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.rename(path, os.path.join(self.pending_dir, name)); requeued += 1
+            except OSError: pass # Finished or requeued by someone else
+        return requeued
+
+    def clear(self, job_id): # Removes everything left for a job (finished, cancelled or abandoned)
+        for folder in (self.pending_dir, self.claimed_dir):
+            for name in os.listdir(folder):
+                if name.startswith(f"{job_id}."):
+                    try: os.remove(os.path.join(folder, name))
+                    except OSError: pass
+        job_dir = os.path.join(self.results_dir, job_id)
+        for name in (os.listdir(job_dir) if os.path.isdir(job_dir) else []):
+            try: os.remove(os.path.join(job_dir, name))
+            except OSError: pass
+        try: os.rmdir(job_dir)
+        except OSError: pass
+
+    def _drop_claim(self, job_id, shard_id):
+        try: os.remove(os.path.join(self.claimed_dir, f"{job_id}.{shard_id}.task"))
+        except OSError: pass
+
+TRANSPORTS = {'directory': DirectoryQueue}
+
+def open_queue(settings, base_dir): # Transport named by the 'distributed_settings' section; relative queue_dir is under base_dir
+    transport = settings.get('transport', 'directory')
+    if transport not in TRANSPORTS:
+        raise ValueError(f"Unknown work queue transport '{transport}'. Available: {', '.join(TRANSPORTS)}")
+    queue_dir = settings.get('queue_dir', os.path.join('source', 'queue'))
+    return TRANSPORTS[transport](queue_dir if os.path.isabs(queue_dir) else os.path.join(base_dir, queue_dir))
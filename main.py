@@ -1,146 +1,444 @@
-# --- main.py ---
-
-import threading
-import os
-import json
-import pandas as pd
-from datetime import datetime
-from engine import fetch_data, indicators, format_dataset, create_report, fetch_delivery_data
-
-class Engine:
-    def __init__(self, app_path, log_callback, progress_callback):
-        self.app_path = app_path
-        self.log = log_callback
-        self.update_progress = progress_callback
-        self.stop_event = threading.Event()
-        self.config = self._load_config()
-        self.analysis_reports = {}
-
-    def _load_config(self):
-        config_path = os.path.join(self.app_path, "source", "config.json")
-        try:
-            with open(config_path, "r") as f:
-                return json.load(f)
-        except Exception as e:
-            self.log(f"ERROR: config.json invalid or not found at '{config_path}': {e}", "ERROR")
-            return {}
-
-    def start_data_fetch_in_thread(self, gui_config):
-        self.config = gui_config; self.stop_event.clear()
-        threading.Thread(target=self._run_data_fetch_flow, daemon=True).start()
-
-    def start_analysis_in_thread(self, gui_config, analysis_tasks):
-        self.config = gui_config; self.stop_event.clear()
-        self.analysis_reports.clear()
-        threading.Thread(target=self._run_analysis_flow, args=(analysis_tasks,), daemon=True).start()
-        
-    def start_export_in_thread(self, gui_config):
-        self.config = gui_config; self.stop_event.clear()
-        threading.Thread(target=self._run_export_flow, daemon=True).start()
-
-    def stop_process(self):
-        self.log("--- STOP-SIGNAL SENT ---", 'WARNING'); self.stop_event.set()
-
-    def _run_data_fetch_flow(self):
-        try:
-            self.log("="*80 + "\n--- Running Data Fetch ---", 'HEADER')
-            self.update_progress(0.1, "Starting data fetch...")
-            # Ensure file paths in config are absolute for robustness
-            for key, path in self.config['file_paths'].items():
-                if not os.path.isabs(path):
-                    self.config['file_paths'][key] = os.path.join(self.app_path, path)
-
-            fetch_data.prepare_market_data(self.config, self.log)
-        finally:
-            self.log(f"--- Process Finished ---", "SUCCESS")
-            self.update_progress(1.0, "Data Fetch Finished.")
-            self.log("INTERNAL_STATE_UPDATE", "ANALYSIS_READY")
-
-    def _run_analysis_flow(self, analysis_tasks):
-        try:    
-            self.log("\n" + "="*80 + "\n--- Running Analysis ---", 'HEADER'); self.update_progress(0.1, "Loading local data...")
-            
-            paths = self.config['file_paths']
-            n500_tickers_path = os.path.join(self.app_path, paths['n500_tickers_file'])
-            fno_tickers_path = os.path.join(self.app_path, paths['fno_tickers_file'])
-            n500_ohlcv_path = os.path.join(self.app_path, paths['n500_ohlcv_file'])
-            fno_ohlcv_path = os.path.join(self.app_path, paths['fno_ohlcv_file'])
-
-            try:
-                n500_tickers = pd.read_csv(n500_tickers_path)['Symbol'].tolist()
-                fno_tickers = pd.read_csv(fno_tickers_path)['Symbol'].tolist()
-                n500_ohlcv = pd.read_csv(n500_ohlcv_path, header=[0, 1], index_col=0, parse_dates=True)
-                fno_ohlcv = pd.read_csv(fno_ohlcv_path, header=[0, 1], index_col=0, parse_dates=True)
-            except FileNotFoundError as e: 
-                self.log(f"ERROR: Could not load data file: {e}. Run 'Fetch Data' first.", "ERROR"); return
-
-            self.log("INFO: Fetching latest NSE delivery percentage data...", "INFO")
-            delivery_df = fetch_delivery_data.get_latest_delivery_report(log_func=self.log)
-            if delivery_df.empty:
-                self.log("WARNING: Could not fetch delivery data. The 'High Delivery' signal will be disabled.", "WARNING")
-            else:
-                self.log(f"SUCCESS: Fetched delivery data for {delivery_df.attrs.get('date', 'N/A')}. Found {len(delivery_df)} records.", "SUCCESS")
-                delivery_df['Symbol'] = delivery_df['Symbol'] + '.NS'
-                delivery_df.set_index('Symbol', inplace=True)
-                
-            for task_name in analysis_tasks: 
-                if self.stop_event.is_set(): return
-                self.log(f"\n--- Analyzing: {task_name} ---", "INFO")
-                stock_list = n500_tickers if 'N500' in task_name else fno_tickers
-                ohlcv_data = n500_ohlcv if 'N500' in task_name else fno_ohlcv
-                analysis_type = 'Swing' if 'SWING' in task_name else 'Momentum'
-                raw_results = []
-                for i, symbol in enumerate(stock_list):
-                    if self.stop_event.is_set(): break
-                    if (i + 1) % 100 == 0: self.log(f"  ...processed {i+1}/{len(stock_list)} for {task_name}...")
-                    try:
-                        stock_df = ohlcv_data.loc[:, (slice(None), symbol)]; stock_df.columns = stock_df.columns.droplevel(1)
-                        if stock_df.empty or stock_df.isnull().all().all(): continue
-                    except KeyError: continue
-                    
-                    # --- MODIFIED LOGIC: Look up Delivery % for BOTH N500 and F&O stocks ---
-                    delivery_perc = 0.0
-                    if not delivery_df.empty and symbol in delivery_df.index:
-                        delivery_perc = delivery_df.at[symbol, 'Delivery_Perc']
-                    
-                    # Pass the delivery percentage to the indicator function
-                    enriched_df = indicators.add_all_indicators(
-                        stock_df.reset_index(), 
-                        self.config['swing_rules'], 
-                        self.config['momentum_rules'],
-                        delivery_perc=delivery_perc
-                    )
-
-                    if enriched_df is None or enriched_df.empty: continue
-                    latest_row = enriched_df.iloc[-1]
-                    signals = indicators.evaluate_swing_rules(latest_row, self.config['swing_rules']) if analysis_type == 'Swing' else indicators.evaluate_momentum_rules(latest_row, self.config['momentum_rules'])
-                    for result in signals:
-                        result.update({'TimeStamp': datetime.now().strftime("%Y-%m-%d %H:%M"), 'Stock': symbol.replace('.NS', '')})
-                        raw_results.append(result)
-                if not self.stop_event.is_set():
-                    final_report_df = format_dataset.create_wide_report(raw_results, task_name)
-                    self.analysis_reports[task_name] = final_report_df
-                    self.log(f"SUCCESS: Analysis for {task_name} complete. Found {len(final_report_df)} potential signals.", "SUCCESS")
-        finally:
-            if self.stop_event.is_set():
-                self.log(f"--- Process Stopped by User ---", "WARNING")
-            else:
-                self.log(f"--- Process Finished. Ready for Export. ---", "SUCCESS")
-            self.update_progress(1.0, "Analysis Finished.")
-            self.log("INTERNAL_STATE_UPDATE", "EXPORT_READY")
-            
-    def _run_export_flow(self):
-        try:
-            self.log("\n" + "="*80 + "\n--- Running Export ---", 'HEADER')
-            if not self.analysis_reports:
-                self.log("WARNING: No analysis results to export. Run analysis first.", "WARNING"); return
-            
-            output_dir = self.config['file_paths']['output_dir']
-            if not os.path.isabs(output_dir):
-                self.config['file_paths']['output_dir'] = os.path.join(self.app_path, output_dir)
-
-            create_report.save_to_excel(self.analysis_reports, self.config, self.log)
-        finally:
-            self.log(f"--- Process Finished ---", "SUCCESS")
-            self.update_progress(1.0, "Export Finished.")
-            self.log("INTERNAL_STATE_UPDATE", "IDLE")
+# --- main.py ---
+
+import threading
+import itertools
+import os
+import sys
+import json
+import time
+import subprocess
+from datetime import datetime
+DELIVERY_RECHECK_MINUTES = 15 # An older-than-today delivery report is re-checked for a newer one after this long
+MAX_WORKER_FAILURES = 3 # Local shard workers that may exit with an error before a sharded task gives up
+
+# NOTE: engine modules (and with them pandas, yfinance, requests, nse, openpyxl) are imported
+# inside the flows that use them, so the GUI window and CLI come up without paying for them.
+
+class Engine:
+    def __init__(self, app_path, log_callback, progress_callback):
+        self.app_path = app_path
+        self.log = log_callback
+        self.update_progress = progress_callback
+        self.stop_event = threading.Event()
+        self.config = self._load_config()
+        self.analysis_reports = {}
+        self.ranking_reports = {}   # '<universe>_TOP<k>_BY_DATE' -> best K symbols per panel date, exported with the reports
+        self._frame_memo = {}     # path -> (file signature, DataFrame); skips re-parsing unchanged CSVs
+        self._delivery_memo = None  # (fetched at, DataFrame); kept for the day once it holds today's Bhavcopy
+        self._local_workers = []    # shard worker processes started by this engine for sharded scans
+        self._worker_failures = 0   # local workers that exited with an error during the current sharded task
+
+    def _load_config(self):
+        config_path = os.path.join(self.app_path, "source", "config.json")
+        try:
+            with open(config_path, "r") as f:
+                return json.load(f)
+        except Exception as e:
+            self.log(f"ERROR: config.json invalid or not found at '{config_path}': {e}", "ERROR")
+            return {}
+
+    def start_data_fetch_in_thread(self, gui_config):
+        self.config = gui_config; self.stop_event.clear()
+        threading.Thread(target=self._run_data_fetch_flow, daemon=True).start()
+
+    def start_analysis_in_thread(self, gui_config, analysis_tasks):
+        self.config = gui_config; self.stop_event.clear()
+        self.analysis_reports.clear(); self.ranking_reports.clear()
+        threading.Thread(target=self._run_analysis_flow, args=(analysis_tasks,), daemon=True).start()
+        
+    def start_export_in_thread(self, gui_config):
+        self.config = gui_config; self.stop_event.clear()
+        threading.Thread(target=self._run_export_flow, daemon=True).start()
+
+    def stop_process(self):
+        self.log("--- STOP-SIGNAL SENT ---", 'WARNING'); self.stop_event.set()
+
+    def load_signal_history(self): # Changes recorded by every past export, newest first; empty before the first export
+        output_dir = self.config.get('file_paths', {}).get('output_dir', '')
+        if not os.path.isabs(output_dir): output_dir = os.path.join(self.app_path, output_dir)
+        from engine import signal_diff
+        return signal_diff.load_history(output_dir)
+
+    def _read_csv_cached(self, path, **kwargs): # Re-uses the parsed frame while the file on disk is unchanged
+        import pandas as pd
+        from engine import result_cache
+        signature = result_cache.file_signature(path)
+        memo = self._frame_memo.get(path)
+        if signature is not None and memo is not None and memo[0] == signature:
+            return memo[1]
+        df = pd.read_csv(path, **kwargs)
+        self._frame_memo[path] = (signature, df)
+        return df
+
+    def _load_ohlcv_panel(self, csv_path): # Maps the shared panel cache; rebuilds it from the CSV when missing or stale
+        from engine import panel_store
+        panel = panel_store.open_panel(csv_path)
+        if panel is not None:
+            return panel
+        import pandas as pd
+        ohlcv_df = pd.read_csv(csv_path, header=[0, 1], index_col=0, parse_dates=True) # Not memoised: the panel replaces it
+        try:
+            panel_store.write_panel(ohlcv_df, csv_path)
+            panel = panel_store.open_panel(csv_path)
+            self.log(f"INFO: Rebuilt panel cache for '{os.path.basename(csv_path)}'.", "INFO")
+        except (OSError, ValueError) as e:
+            self.log(f"WARNING: Could not write panel cache for '{csv_path}': {e}. Using in-memory data.", "WARNING")
+        return panel if panel is not None else panel_store.OHLCVPanel.from_frame(ohlcv_df)
+
+    def _get_delivery_data(self): # Re-uses the last delivery report while no newer one can have been published
+        from engine import fetch_delivery_data
+        now = datetime.now()
+        if self._delivery_memo is not None:
+            fetched_at, memo_df = self._delivery_memo
+            is_current = memo_df.attrs.get('date') == now.strftime("%Y-%m-%d") # Today's report is the newest there can be
+            recently_checked = fetched_at.date() == now.date() and (now - fetched_at).total_seconds() < DELIVERY_RECHECK_MINUTES * 60
+            if is_current or recently_checked:
+                self.log(f"INFO: Re-using delivery data for {memo_df.attrs.get('date', 'N/A')} fetched at {fetched_at.strftime('%H:%M')}.", "INFO")
+                return memo_df
+        self.log("INFO: Fetching latest NSE delivery percentage data...", "INFO")
+        delivery_df = fetch_delivery_data.get_latest_delivery_report(log_func=self.log)
+        if delivery_df.empty:
+            self.log("WARNING: Could not fetch delivery data. The 'High Delivery' signal will be disabled.", "WARNING")
+            return delivery_df
+        self.log(f"SUCCESS: Fetched delivery data for {delivery_df.attrs.get('date', 'N/A')}. Found {len(delivery_df)} records.", "SUCCESS")
+        delivery_df['Symbol'] = delivery_df['Symbol'] + '.NS'
+        delivery_df.set_index('Symbol', inplace=True)
+        self._delivery_memo = (now, delivery_df)
+        return delivery_df
+
+    def _ensure_local_workers(self, queue_root, count): # Keeps `count` shard workers running here; False once they keep crashing
+        running = []
+        for p in self._local_workers:
+            code = p.poll()
+            if code is None: running.append(p)
+            elif code != 0: self._worker_failures += 1 # 0 is a normal idle exit
+        self._local_workers = running
+        if self._worker_failures >= MAX_WORKER_FAILURES: return False
+        with open(os.path.join(queue_root, 'local_workers.log'), 'ab') as log_file: # Worker tracebacks end up here
+            for _ in range(count - len(self._local_workers)):
+                self._local_workers.append(subprocess.Popen([sys.executable, '-m', 'engine.shard_worker', '--queue-dir', queue_root, '--idle-exit', '30'],
+                                                            cwd=os.path.dirname(os.path.abspath(__file__)), stdout=subprocess.DEVNULL, stderr=log_file))
+        return True
+
+    def _stop_local_workers(self):
+        for p in self._local_workers: p.terminate()
+        for p in self._local_workers: p.wait() # Reap them so no zombies are left behind
+        self._local_workers = []
+
+    def _run_sharded_task(self, task_name, analysis_type, stock_list, ohlcv_path, delivery_df, min_score, rules_key, settings):
+        """
+        Coordinator side of a sharded scan: splits the universe into shards, publishes them on the work queue
+        and merges the workers' columnar results. Workers on other hosts only need to run engine/shard_worker.py
+        against the same queue; `local_workers` more are started here.
+
+        Returns:
+            tuple: ({symbol: (symbol_key, signal dicts)} for every symbol a worker finished, pruned count, failed shard count)
+        """
+        from engine import work_queue
+        queue = work_queue.open_queue(settings, self.app_path)
+        shard_size = max(1, int(settings.get('shard_size', 100)))
+        claim_timeout = float(settings.get('claim_timeout', 600))
+        delivery = {} if delivery_df.empty else delivery_df['Delivery_Perc'].groupby(level=0).first().to_dict()
+        job_id = f"{task_name}-{time.time_ns():x}"
+        shards = {}
+        for n, start in enumerate(range(0, len(stock_list), shard_size)):
+            symbols = stock_list[start:start + shard_size]
+            shards[f"{n:05d}"] = {'ohlcv_path': ohlcv_path, 'symbols': symbols, 'analysis_type': analysis_type, 'min_score': min_score, 'rules_key': rules_key,
+                                  'swing_rules': self.config['swing_rules'], 'momentum_rules': self.config['momentum_rules'],
+                                  'delivery': {s: float(delivery[s]) for s in symbols if s in delivery}}
+        queue.submit(job_id, shards)
+        local_workers = int(settings.get('local_workers', 2))
+        self._worker_failures = 0
+        self.log(f"INFO: Published {len(shards)} shards of up to {shard_size} symbols for {task_name}.", "INFO")
+
+        finished, pruned, failed, results = {}, 0, 0, {}
+        try:
+            while len(finished) < len(shards):
+                if local_workers and not self._ensure_local_workers(queue.root, local_workers):
+                    failed += len(shards) - len(finished)
+                    self.log(f"ERROR: Local shard workers exited with errors {self._worker_failures} times (see '{os.path.join(queue.root, 'local_workers.log')}'). "
+                             f"Giving up on {len(shards) - len(finished)} unfinished shards of {task_name}.", "ERROR")
+                    break
+                for shard_id, result in queue.collect(job_id, finished).items():
+                    finished[shard_id] = result
+                    if result['error']:
+                        failed += 1
+                        self.log(f"ERROR: Shard {shard_id} of {task_name} failed on {result.get('worker', '?')}: {result['error']}", "ERROR"); continue
+                    pruned += result['pruned']
+                    columns = result['columns']
+                    symbol_signals = {symbol: [] for symbol in result['keys']}
+                    for symbol, criteria, met, threshold, current in zip(*(columns[c] for c in ('Symbol', 'Criteria', 'SignalBool', 'ThresholdValue', 'CurrentValue'))):
+                        symbol_signals[symbol].append({'Criteria': criteria, 'SignalBool': met, 'ThresholdValue': threshold, 'CurrentValue': current})
+                    for symbol, key in result['keys'].items(): results[symbol] = (key, symbol_signals[symbol])
+                self.update_progress(0.1 + 0.8 * len(finished) / len(shards), f"{task_name}: {len(finished)}/{len(shards)} shards")
+                if len(finished) < len(shards):
+                    if self.stop_event.is_set(): break # Shards finished so far are kept for the partial report
+                    if queue.requeue_stale(job_id, claim_timeout): self.log(f"WARNING: Re-queued shards of {task_name} from unresponsive workers.", "WARNING")
+                    time.sleep(0.5)
+        finally:
+            queue.clear(job_id)
+            if self.stop_event.is_set() or self._worker_failures >= MAX_WORKER_FAILURES:
+                self._stop_local_workers()
+        return results, pruned, failed
+
+    def _run_data_fetch_flow(self):
+        try:
+            from engine import fetch_data
+            self.log("="*80 + "\n--- Running Data Fetch ---", 'HEADER')
+            self.update_progress(0.1, "Starting data fetch...")
+            # Ensure file paths in config are absolute for robustness
+            for key, path in self.config['file_paths'].items():
+                if not os.path.isabs(path):
+                    self.config['file_paths'][key] = os.path.join(self.app_path, path)
+
+            fetch_data.prepare_market_data(self.config, self.log)
+        finally:
+            self.log(f"--- Process Finished ---", "SUCCESS")
+            self.update_progress(1.0, "Data Fetch Finished.")
+            self.log("INTERNAL_STATE_UPDATE", "ANALYSIS_READY")
+
+    def _run_analysis_flow(self, analysis_tasks):
+        try:    
+            from engine import indicators, format_dataset, result_cache, rule_dsl, ranking, run_journal, data_quality
+            self.log("\n" + "="*80 + "\n--- Running Analysis ---", 'HEADER'); self.update_progress(0.1, "Loading local data...")
+            
+            paths = self.config['file_paths']
+            n500_tickers_path = os.path.join(self.app_path, paths['n500_tickers_file'])
+            fno_tickers_path = os.path.join(self.app_path, paths['fno_tickers_file'])
+            n500_ohlcv_path = os.path.join(self.app_path, paths['n500_ohlcv_file'])
+            fno_ohlcv_path = os.path.join(self.app_path, paths['fno_ohlcv_file'])
+
+            try:
+                n500_tickers = self._read_csv_cached(n500_tickers_path)['Symbol'].tolist()
+                fno_tickers = self._read_csv_cached(fno_tickers_path)['Symbol'].tolist()
+                n500_ohlcv = self._load_ohlcv_panel(n500_ohlcv_path)
+                fno_ohlcv = self._load_ohlcv_panel(fno_ohlcv_path)
+            except FileNotFoundError as e: 
+                self.log(f"ERROR: Could not load data file: {e}. Run 'Fetch Data' first.", "ERROR"); return
+            for ohlcv_path in (n500_ohlcv_path, fno_ohlcv_path): # Issues found (and not fixed by re-downloading) at fetch time
+                quality = data_quality.load_report(ohlcv_path)
+                if quality and quality.get('symbols_flagged'):
+                    self.log(f"WARNING: {quality['symbols_flagged']}/{quality['symbols_checked']} {quality['dataset']} symbols have data-quality issues {quality['summary']}. See '{os.path.basename(ohlcv_path)}' quality report.", "WARNING")
+
+            delivery_df = self._get_delivery_data()
+            delivery_date = None if delivery_df.empty else delivery_df.attrs.get('date')
+
+            analysis_cfg = self.config.get('analysis_settings', {})
+            use_cache = analysis_cfg.get('use_result_cache', True)
+            min_score = analysis_cfg.get('min_score', 0) or 0 # 0 = full report; >0 or 'all' enables two-stage screening
+            if min_score != indicators.ALL_CRITERIA: min_score = int(min_score)
+            cache_dir = os.path.join(self.app_path, paths.get('cache_dir', os.path.join('source', 'cache')))
+            journal_dir = os.path.join(cache_dir, 'journal')
+            checkpoint_every = int(analysis_cfg.get('checkpoint_every', 50) or 0) # Symbols per durable journal chunk; 0 disables resume
+            rule_sets = self.config.get('rule_sets', {})
+            rule_set_results = {} # universe -> {rule set: signals}; every selected rule set of a universe is evaluated in one pass
+            ranking_cfg = self.config.get('ranking_settings', {})
+            benchmark_path = os.path.join(self.app_path, paths.get('benchmark_file', os.path.join('source', 'ohlcv_benchmark.csv')))
+            benchmark_close = ranking.load_benchmark(benchmark_path)
+            if benchmark_close is None: self.log("INFO: No benchmark data found. Ranking will skip relative strength.", "INFO")
+            distributed_cfg = self.config.get('distributed_settings', {})
+            top_k = int(ranking_cfg.get('top_k', 0) or 0)
+            report_filter = {'min_score': min_score, 'top_k': top_k} # Stored with each report so change tracking only compares like with like
+            run_id = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f") # Stored with each report, cache hits included: one id per analysis run
+            universe_fields, universe_recursive, universe_rankings = {}, {}, {} # universe -> panel field frames / RSI-ATR-ADX arrays / latest ranking
+
+            def fields_for(universe, panel, symbols): # Field frames are shared by the kernels, rule sets and ranking
+                if universe not in universe_fields: universe_fields[universe] = panel.field_frames(symbols)
+                return universe_fields[universe]
+
+            def recursive_for(universe, panel, symbols): # Shared by both checklists of a universe and its ranking; None if stopped first
+                if universe not in universe_recursive:
+                    recursive = indicators.compute_recursive_panel(fields_for(universe, panel, symbols), self.config['swing_rules'], stop_event=self.stop_event)
+                    if recursive is None: return None
+                    universe_recursive[universe] = recursive
+                return universe_recursive[universe]
+
+            def ranking_for(universe, panel, symbols, ohlcv_path, tickers_path): # --- CROSS-SECTIONAL RANKING: once per universe, all symbols in one pass ---
+                if universe in universe_rankings or self.stop_event.is_set(): return universe_rankings.get(universe)
+                rsi = None # Re-use the checklist RSI when this universe's kernels already ran with the same period
+                if universe in universe_recursive and int(ranking_cfg.get('rsi_period', 14)) == int(self.config['swing_rules']['rsi_period']):
+                    rsi = universe_recursive[universe]['RSI_14']
+                factors, _, composite = ranking.cross_sectional_ranks(fields_for(universe, panel, symbols), benchmark_close, ranking_cfg, rsi=rsi)
+                latest = ranking.latest_ranking(factors, composite)
+                latest.index = latest.index.str.replace('.NS', '', regex=False)
+                universe_rankings[universe] = latest
+                if top_k: # Best K symbols on every panel date, exported alongside the reports
+                    top_name = f"{universe}_TOP{top_k}_BY_DATE"
+                    top_table = ranking.top_k_per_date(composite, top_k).reset_index()
+                    for col in top_table.columns[1:]: top_table[col] = top_table[col].str.replace('.NS', '', regex=False)
+                    self.ranking_reports[top_name] = top_table
+                    if use_cache:
+                        try: result_cache.save_report(cache_dir, top_name, ranking_key(universe, ohlcv_path, tickers_path), top_table)
+                        except OSError as e: self.log(f"WARNING: Could not cache {top_name}: {e}", "WARNING")
+                return latest
+
+            def ranking_key(universe, ohlcv_path, tickers_path): # Cache key of a universe's per-date top-K table
+                return result_cache.fingerprint(universe, result_cache.file_signature(ohlcv_path), result_cache.file_signature(tickers_path), result_cache.file_signature(benchmark_path), ranking_cfg)
+                
+            for task_name in analysis_tasks: 
+                if self.stop_event.is_set(): return
+                self.log(f"\n--- Analyzing: {task_name} ---", "INFO")
+                stock_list = n500_tickers if 'N500' in task_name else fno_tickers
+                ohlcv_data = n500_ohlcv if 'N500' in task_name else fno_ohlcv
+                ohlcv_path = n500_ohlcv_path if 'N500' in task_name else fno_ohlcv_path
+                tickers_path = n500_tickers_path if 'N500' in task_name else fno_tickers_path
+                analysis_type = 'Swing' if 'SWING' in task_name else 'Momentum'
+                universe, _, strategy = task_name.partition('_')
+                custom_rules = rule_sets.get(strategy) if strategy not in ('SWING', 'MOMENTUM') else None
+
+                # --- RESULT CACHE: whole-task hit when data, delivery date and rules are all unchanged ---
+                rules_key = result_cache.fingerprint(custom_rules if custom_rules is not None else result_cache.rules_fingerprint(self.config, analysis_type), min_score)
+                task_key = result_cache.fingerprint(task_name, result_cache.file_signature(ohlcv_path), result_cache.file_signature(tickers_path), delivery_date, rules_key,
+                                                    result_cache.file_signature(benchmark_path), ranking_cfg)
+                if use_cache:
+                    cached_report = result_cache.load_report(cache_dir, task_name, task_key)
+                    if cached_report is not None:
+                        cached_report.attrs['filter'] = report_filter; cached_report.attrs['run_id'] = run_id
+                        self.analysis_reports[task_name] = cached_report
+                        top_name = f"{universe}_TOP{top_k}_BY_DATE"
+                        if top_k and top_name not in self.ranking_reports:
+                            cached_top = result_cache.load_report(cache_dir, top_name, ranking_key(universe, ohlcv_path, tickers_path))
+                            if cached_top is not None: self.ranking_reports[top_name] = cached_top
+                        self.log(f"SUCCESS: {task_name} unchanged since last run. Loaded {len(cached_report)} cached signals.", "SUCCESS")
+                        continue
+                symbol_cache = result_cache.load_symbol_results(cache_dir, task_name) if use_cache else {}
+                new_symbol_cache = {}; reused = 0; pruned = 0; failed_shards = 0
+
+                raw_results = []; journal = None
+                # Universe-wide stages first, each skipped once STOP is pressed, so a partial report is ranked too
+                if custom_rules is None and not distributed_cfg.get('enabled'):
+                    recursive_for(universe, ohlcv_data, stock_list) # Before the ranking, which re-uses its RSI
+                ranking_for(universe, ohlcv_data, stock_list, ohlcv_path, tickers_path)
+                if custom_rules is not None: # --- DECLARATIVE RULE SET: vectorised over the whole universe ---
+                    if universe not in rule_set_results:
+                        if self.stop_event.is_set(): break
+                        selected = {t.partition('_')[2] for t in analysis_tasks if t.partition('_')[0] == universe} - {'SWING', 'MOMENTUM'}
+                        delivery = None if delivery_df.empty else delivery_df['Delivery_Perc'].groupby(level=0).first()
+                        try:
+                            compiled = rule_dsl.compile_rule_sets({name: rule_sets[name] for name in selected if name in rule_sets})
+                            rule_set_results[universe] = rule_dsl.evaluate_rule_sets(compiled, fields_for(universe, ohlcv_data, stock_list), delivery)
+                        except (ValueError, TypeError) as e: # A bad rule skips this universe's rule sets, not the whole run
+                            self.log(f"ERROR: Invalid rule in 'rule_sets': {e}", "ERROR"); rule_set_results[universe] = {}; continue
+                    if strategy not in rule_set_results[universe]: continue
+                    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M")
+                    for symbol, group in itertools.groupby(rule_set_results[universe][strategy], key=lambda r: r['Symbol']):
+                        signals = [{k: v for k, v in r.items() if k != 'Symbol'} for r in group]
+                        if sum(r['SignalBool'] for r in signals) < indicators.required_score(min_score, len(signals)): continue
+                        for result in signals: result.update({'TimeStamp': timestamp, 'Stock': symbol.replace('.NS', '')})
+                        raw_results.extend(signals)
+                elif distributed_cfg.get('enabled'): # --- SHARDED: built-in checklists fanned out to shard workers ---
+                    sharded_results, pruned, failed_shards = self._run_sharded_task(task_name, analysis_type, stock_list, ohlcv_path, delivery_df, min_score, rules_key, distributed_cfg)
+                    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M")
+                    for symbol in stock_list: # Universe order, whatever order the shards finished in
+                        if symbol not in sharded_results: continue
+                        symbol_key, symbol_results = sharded_results[symbol]
+                        for result in symbol_results: result.update({'TimeStamp': timestamp, 'Stock': symbol.replace('.NS', '')})
+                        new_symbol_cache[symbol] = (symbol_key, symbol_results)
+                        raw_results.extend(symbol_results)
+                else: # --- BUILT-IN CHECKLISTS: per-symbol indicator frames ---
+                    # --- RUN JOURNAL: pick up the symbols an interrupted run with the same inputs already finished ---
+                    resumed = run_journal.load_journal(journal_dir, task_name, task_key) if checkpoint_every else {}
+                    if resumed: self.log(f"INFO: Resuming {task_name}: {len(resumed)} symbols were completed by an interrupted run.", "INFO")
+                    if checkpoint_every:
+                        try: journal = run_journal.RunJournal(journal_dir, task_name, task_key, resumed)
+                        except OSError as e: self.log(f"WARNING: Could not open run journal for {task_name}: {e}. Progress will not be resumable.", "WARNING")
+
+                    # RSI/ATR/ADX for the whole universe in one fused pass; each symbol then just takes its column
+                    recursive_panel = None if self.stop_event.is_set() else recursive_for(universe, ohlcv_data, stock_list)
+                    recursive = {} if recursive_panel is None else indicators.compute_recursive_indicators(fields_for(universe, ohlcv_data, stock_list), self.config['swing_rules'],
+                                                                                                              panel=recursive_panel)
+                    for i, symbol in enumerate(stock_list):
+                        if self.stop_event.is_set(): break
+                        if (i + 1) % 100 == 0: self.log(f"  ...processed {i+1}/{len(stock_list)} for {task_name}...")
+                        if journal is not None and (i + 1) % checkpoint_every == 0:
+                            journal.flush()
+                            self.update_progress(0.1 + 0.8 * (i + 1) / len(stock_list), f"{task_name}: {i+1}/{len(stock_list)} symbols")
+                        try:
+                            stock_df = ohlcv_data.symbol_frame(symbol)
+                            if stock_df.empty or stock_df.isnull().all().all(): continue
+                        except KeyError: continue
+                    
+                        # --- MODIFIED LOGIC: Look up Delivery % for BOTH N500 and F&O stocks ---
+                        delivery_perc = 0.0
+                        if not delivery_df.empty and symbol in delivery_df.index:
+                            delivery_perc = delivery_df.at[symbol, 'Delivery_Perc']
+
+                        # --- RESULT CACHE: per-symbol hit when only other symbols' data changed ---
+                        symbol_key = result_cache.fingerprint(rules_key, float(delivery_perc), result_cache.frame_fingerprint(stock_df))
+                        cached_entry = resumed.get(symbol) or symbol_cache.get(symbol)
+                        if cached_entry is not None and cached_entry[0] == symbol_key:
+                            new_symbol_cache[symbol] = cached_entry; raw_results.extend(cached_entry[1]); reused += 1
+                            continue
+                    
+                        # Pass the delivery percentage to the indicator function. With a minimum score set, the
+                        # expensive indicators are only computed for symbols that can still reach it.
+                        signals, was_pruned = indicators.analyze_symbol(
+                            stock_df,
+                            analysis_type,
+                            self.config['swing_rules'],
+                            self.config['momentum_rules'],
+                            delivery_perc=delivery_perc,
+                            min_score=min_score,
+                            precomputed=recursive.get(symbol),
+                            stop_event=self.stop_event
+                        )
+                        if self.stop_event.is_set(): break # Cancelled inside the indicator stages: the symbol is not recorded
+                        pruned += was_pruned
+
+                        symbol_results = []
+                        for result in signals:
+                            result.update({'TimeStamp': datetime.now().strftime("%Y-%m-%d %H:%M"), 'Stock': symbol.replace('.NS', '')})
+                            symbol_results.append(result)
+                        new_symbol_cache[symbol] = (symbol_key, symbol_results)
+                        if journal is not None: journal.add(symbol, symbol_key, symbol_results)
+                        raw_results.extend(symbol_results)
+                if self.stop_event.is_set(): # --- PARTIAL REPORT: keep what finished; the journal lets the next run resume ---
+                    if journal is not None:
+                        try: journal.close(completed=False)
+                        except OSError as e: self.log(f"WARNING: Could not write run journal for {task_name}: {e}", "WARNING")
+                    if raw_results:
+                        partial_df = format_dataset.create_wide_report(raw_results, task_name, ranking=universe_rankings.get(universe))
+                        partial_df.attrs['partial'] = True # Exported, but kept out of the day-over-day change tracking
+                        partial_df.attrs['run_id'] = run_id
+                        self.analysis_reports[task_name] = partial_df
+                        self.log(f"WARNING: {task_name} stopped after {len(new_symbol_cache)}/{len(stock_list)} symbols. Kept a partial report with {len(partial_df)} signals.", "WARNING")
+                    break
+                else:
+                    final_report_df = format_dataset.create_wide_report(raw_results, task_name, ranking=universe_rankings.get(universe), top_k=top_k)
+                    final_report_df.attrs['filter'] = report_filter; final_report_df.attrs['run_id'] = run_id
+                    if failed_shards: final_report_df.attrs['partial'] = True # Symbols of failed shards are missing, not dropped
+                    self.analysis_reports[task_name] = final_report_df
+                    if use_cache and not failed_shards: # A report missing failed shards is shown but not cached
+                        try:
+                            result_cache.save_symbol_results(cache_dir, task_name, new_symbol_cache)
+                            result_cache.save_report(cache_dir, task_name, task_key, final_report_df)
+                        except OSError as e:
+                            self.log(f"WARNING: Could not write result cache for {task_name}: {e}", "WARNING")
+                    if journal is not None: journal.close(completed=True)
+                    if pruned: self.log(f"INFO: Pre-filter skipped expensive indicators for {pruned} symbols that could not reach a score of {'every criterion' if min_score == indicators.ALL_CRITERIA else min_score}.", "INFO")
+                    if reused: self.log(f"INFO: Re-used cached results for {reused}/{len(new_symbol_cache)} unchanged symbols.", "INFO")
+                    self.log(f"SUCCESS: Analysis for {task_name} complete. Found {len(final_report_df)} potential signals.", "SUCCESS")
+        finally:
+            if self.stop_event.is_set():
+                self.log(f"--- Process Stopped by User ---", "WARNING")
+            else:
+                self.log(f"--- Process Finished. Ready for Export. ---", "SUCCESS")
+            self.update_progress(1.0, "Analysis Finished.")
+            self.log("INTERNAL_STATE_UPDATE", "EXPORT_READY")
+            
+    def _run_export_flow(self):
+        try:
+            self.log("\n" + "="*80 + "\n--- Running Export ---", 'HEADER')
+            if not self.analysis_reports:
+                self.log("WARNING: No analysis results to export. Run analysis first.", "WARNING"); return
+            
+            output_dir = self.config['file_paths']['output_dir']
+            if not os.path.isabs(output_dir):
+                self.config['file_paths']['output_dir'] = os.path.join(self.app_path, output_dir)
+
+            from engine import create_report
+            create_report.save_to_excel(self.analysis_reports, self.config, self.log, ranking_reports=self.ranking_reports)
+        finally:
+            self.log(f"--- Process Finished ---", "SUCCESS")
+            self.update_progress(1.0, "Export Finished.")
+            self.log("INTERNAL_STATE_UPDATE", "IDLE")